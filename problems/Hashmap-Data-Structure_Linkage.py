@@ -1,16 +1,360 @@
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future
+import functools
 import heapq
+import sys
+import threading
+import time
 
 # Pattern 1: HashMap + Linked List (LRU Cache)
-class HashMapLinkedList:
-    """HashMap stores references to linked list nodes"""
+class Node:
+    __slots__ = ("key", "value", "size", "expires", "freq", "prev", "next")
+    
+    def __init__(self, key, value, size, expires):
+        self.key = key
+        self.value = value
+        self.size = size
+        self.expires = expires  # clock() deadline, or None to live until evicted
+        self.freq = 1
+        self.prev = self.next = None
+
+class LinkedList:
+    """Doubly linked list of nodes, most recently used at the head"""
+    __slots__ = ("head", "tail", "length")
+    
     def __init__(self):
-        self.map = {}  # key -> Node
         self.head = self.tail = None
+        self.length = 0
+    
+    def push_front(self, node):
+        node.prev, node.next = None, self.head
+        if self.head is not None:
+            self.head.prev = node
+        else:
+            self.tail = node
+        self.head = node
+        self.length += 1
+    
+    def unlink(self, node):
+        if node.prev is not None:
+            node.prev.next = node.next
+        else:
+            self.head = node.next
+        if node.next is not None:
+            node.next.prev = node.prev
+        else:
+            self.tail = node.prev
+        node.prev = node.next = None
+        self.length -= 1
+    
+    def __iter__(self):
+        node = self.head
+        while node is not None:
+            yield node
+            node = node.next
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "evictions", "expirations")
+    
+    def __init__(self):
+        self.hits = self.misses = self.evictions = self.expirations = 0
+    
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def __repr__(self):
+        return (f"CacheStats(hits={self.hits}, misses={self.misses}, evictions={self.evictions}, "
+                f"expirations={self.expirations}, hit_rate={self.hit_rate:.2f})")
+
+_MISSING = object()
+
+class HashMapLinkedList:
+    """HashMap stores references to linked list nodes: an O(1) LRU cache.
+
+    Bounded by entry count (`capacity`), total size (`max_bytes`, as measured
+    by `sizer`), or both. Entries may carry a TTL; an expired entry is dropped
+    when it is next looked up or reaches the eviction end of the list.
+    """
+    def __init__(self, capacity=None, max_bytes=None, sizer=sys.getsizeof, ttl=None, clock=time.monotonic):
+        self.map = {}  # key -> Node
+        self.list = LinkedList()
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self.ttl = ttl  # Default seconds to live for put() calls without their own
+        self.clock = clock
+        self.bytes = 0
+        self.stats = CacheStats()
+    
+    def __len__(self):
+        return len(self.map)
+    
+    def __contains__(self, key):
+        # Doesn't count as a use
+        node = self.map.get(key)
+        return node is not None and not self._expired(node)
+    
+    def get(self, key, default=None):
+        node = self.map.get(key)
+        if node is None:
+            self.stats.misses += 1
+            return default
+        if self._expired(node):
+            self._drop(node)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return default
+        self._touch(node)
+        self.stats.hits += 1
+        return node.value
+    
+    def put(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = self.clock() + ttl if ttl is not None else None
+        size = self.sizer(value) if self.max_bytes is not None else 0
+        node = self.map.get(key)
+        if node is not None:  # Out of the running while room is made; relinked below as a use
+            self._drop(node)
+            if self._expired(node):  # Comes back as a new entry
+                self.stats.expirations += 1
+                node = None
+        if self.capacity == 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return  # Too big to keep at all
+        
+        self._make_room(size)
+        if node is not None:  # Same node, so LFU keeps the entry's use count
+            node.value, node.size, node.expires = value, size, expires
+            node.freq += 1
+        else:
+            node = Node(key, value, size, expires)
+        self.map[key] = node
+        self.bytes += size
+        self._link(node)
+    
+    def delete(self, key):
+        node = self.map.get(key)
+        if node is None:
+            return False
+        self._drop(node)
+        return not self._expired(node)  # An expired entry was already gone
+    
+    def clear(self):
+        for node in list(self.map.values()):
+            self._drop(node)
+    
+    def _expired(self, node):
+        return node.expires is not None and node.expires <= self.clock()
+    
+    def _make_room(self, size):
+        # Evict before linking, so the entry being added is never its own victim
+        while self.map and ((self.capacity is not None and len(self.map) >= self.capacity) or
+                            (self.max_bytes is not None and self.bytes + size > self.max_bytes)):
+            node = self._victim()
+            if self._expired(node):
+                self.stats.expirations += 1
+            else:
+                self.stats.evictions += 1
+            self._drop(node)
     
-    def example(self):
-        # self.map[key] = node_reference
-        pass
+    def _drop(self, node):
+        del self.map[node.key]
+        self.bytes -= node.size
+        self._unlink(node)
+    
+    # Eviction policy: LRU keeps one list in recency order
+    def _link(self, node):
+        self.list.push_front(node)
+    
+    def _touch(self, node):
+        if node is not self.list.head:
+            self.list.unlink(node)
+            self.list.push_front(node)
+    
+    def _unlink(self, node):
+        self.list.unlink(node)
+    
+    def _victim(self):
+        return self.list.tail
+
+class LFUCache(HashMapLinkedList):
+    """Evicts the least frequently used entry, least recently used among ties.
+
+    Entries sit in one linked list per use count, so a hit moves a node from
+    bucket f to f + 1 and eviction takes the tail of the lowest bucket.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = defaultdict(LinkedList)  # use count -> nodes with it, most recent first
+        self.min_freq = 1  # No live entry has a lower count; the bucket may be gone
+    
+    def _link(self, node):
+        self.buckets[node.freq].push_front(node)
+        self.min_freq = min(self.min_freq, node.freq)
+    
+    def _touch(self, node):
+        self._unlink(node)
+        if node.freq == self.min_freq and self.min_freq not in self.buckets:
+            self.min_freq += 1
+        node.freq += 1
+        self.buckets[node.freq].push_front(node)
+    
+    def _unlink(self, node):
+        bucket = self.buckets[node.freq]
+        bucket.unlink(node)
+        if not bucket.length:
+            del self.buckets[node.freq]
+    
+    def _victim(self):
+        if self.min_freq not in self.buckets:  # Its last entry was deleted or expired
+            self.min_freq = min(self.buckets)
+        return self.buckets[self.min_freq].tail
+
+def memoize(cache=None, key=None):
+    """Decorator caching a function's results in `cache` (a 128-entry LRU by default).
+
+    `key` maps the call's arguments to a cache key; by default it is the
+    positional args plus sorted keyword args, which must then be hashable.
+    """
+    def decorator(func):
+        store = cache if cache is not None else HashMapLinkedList(capacity=128)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                cache_key = key(*args, **kwargs)
+            else:
+                cache_key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            value = store.get(cache_key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                store.put(cache_key, value)
+            return value
+        
+        wrapper.cache = store
+        return wrapper
+    return decorator
+
+class ShardedCache:
+    """Thread-safe cache split into independent segments, each with its own lock.
+
+    A key's shard is picked by its hash. Hits are served without taking the lock:
+    the node is queued in the shard's read buffer and only relinked in one
+    locked batch when the buffer fills or the shard is next written to, so
+    readers of hot keys don't queue behind each other.
+    """
+    PROMOTE_BATCH = 64  # Buffered hits per shard before they are applied
+    
+    def __init__(self, shards=16, capacity=None, max_bytes=None, cache=HashMapLinkedList, **kwargs):
+        for name, total in (("capacity", capacity), ("max_bytes", max_bytes)):
+            if total is not None and total < shards:
+                raise ValueError(f"{name}={total} leaves some of the {shards} shards with nothing; use fewer shards")
+        def share(total, index):
+            # Spread the remainder over the first shards, so the limits sum to exactly `total`
+            return total // shards + (index < total % shards) if total is not None else None
+        self.shards = [cache(capacity=share(capacity, index), max_bytes=share(max_bytes, index), **kwargs)
+                       for index in range(shards)]
+        self.locks = [threading.Lock() for _ in range(shards)]
+        self.reads = [deque() for _ in range(shards)]  # Hit nodes not yet promoted
+        self.loading = [{} for _ in range(shards)]  # key -> Future of an in-flight get_or_load
+    
+    @property
+    def capacity(self):
+        if self.shards[0].capacity is None:
+            return None
+        return sum(shard.capacity for shard in self.shards)
+    
+    @property
+    def max_bytes(self):
+        if self.shards[0].max_bytes is None:
+            return None
+        return sum(shard.max_bytes for shard in self.shards)
+    
+    @property
+    def stats(self):
+        total = CacheStats()
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                self._promote(index)
+                total.hits += shard.stats.hits
+                total.misses += shard.stats.misses
+                total.evictions += shard.stats.evictions
+                total.expirations += shard.stats.expirations
+        return total
+    
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+    
+    def __contains__(self, key):
+        return key in self.shards[hash(key) % len(self.shards)]
+    
+    def get(self, key, default=None):
+        index = hash(key) % len(self.shards)
+        shard = self.shards[index]
+        node = shard.map.get(key)
+        if node is None or shard._expired(node):
+            with self.locks[index]:
+                return shard.get(key, default)  # Counts the miss and drops an expired entry
+        value = node.value
+        reads = self.reads[index]
+        reads.append(node)
+        if len(reads) >= self.PROMOTE_BATCH:
+            with self.locks[index]:
+                self._promote(index)
+        return value
+    
+    def put(self, key, value, ttl=None):
+        index = hash(key) % len(self.shards)
+        with self.locks[index]:
+            self._promote(index)  # So eviction sees the latest reads
+            self.shards[index].put(key, value, ttl)
+    
+    def delete(self, key):
+        index = hash(key) % len(self.shards)
+        with self.locks[index]:
+            return self.shards[index].delete(key)
+    
+    def get_or_load(self, key, loader):
+        """Cached value for `key`, else `loader(key)`, called once however many threads miss together"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        
+        index = hash(key) % len(self.shards)
+        shard, loading = self.shards[index], self.loading[index]
+        with self.locks[index]:
+            node = shard.map.get(key)
+            if node is not None and not shard._expired(node):  # Loaded since our miss
+                return node.value
+            future = loading.get(key)
+            leader = future is None
+            if leader:
+                future = loading[key] = Future()
+        if not leader:
+            return future.result()
+        
+        try:
+            value = loader(key)
+        except BaseException as error:
+            with self.locks[index]:
+                del loading[key]
+            future.set_exception(error)  # Waiters see the same failure; the next call retries
+            raise
+        with self.locks[index]:
+            shard.put(key, value)
+            del loading[key]
+        future.set_result(value)
+        return value
+    
+    def _promote(self, index):
+        """Caller holds the shard's lock"""
+        shard, reads = self.shards[index], self.reads[index]
+        for _ in range(len(reads)):
+            node = reads.popleft()
+            shard.stats.hits += 1
+            if shard.map.get(node.key) is node:  # Not evicted or replaced since the read
+                shard._touch(node)
 
 # Pattern 2: HashMap + Array/List (Index Mapping)
 class HashMapArray:
@@ -32,19 +376,168 @@ class HashMapArray:
 
 # Pattern 3: HashMap + Heap (Priority Queue with Updates)
 class HashMapHeap:
-    """HashMap tracks elements in heap for O(1) existence checks"""
-    def __init__(self):
-        self.heap = []
-        self.in_heap = set()  # Track what's currently in heap
-        self.map = {}  # key -> priority or other metadata
+    """HashMap tracks each item's position in the heap: an indexed priority queue.
+
+    Every item has exactly one entry, so update_priority and remove sift it in
+    place in O(log n). With lazy=True they instead leave the old entry behind
+    and pop skips it; the heap is rebuilt without stale entries once they make
+    up more than `compact_ratio` of it.
+    """
+    COMPACT_MIN = 64  # Smaller heaps aren't worth rebuilding
+    
+    def __init__(self, lazy=False, compact_ratio=0.5):
+        self.lazy = lazy
+        self.compact_ratio = compact_ratio
+        self.heap = []  # Items, or [priority, seq, item] entries when lazy
+        self.keys = []  # Priorities parallel to heap (not used when lazy)
+        self.map = {}  # item -> priority
+        self.positions = {}  # item -> index in heap, or its live entry when lazy
+        self.seq = 0
+    
+    @classmethod
+    def heapify_from(cls, pairs, **kwargs):
+        """Build from (item, priority) pairs in O(n); a repeated item keeps its last priority"""
+        queue = cls(**kwargs)
+        queue.map = dict(pairs)
+        if queue.lazy:
+            queue.heap = [[priority, seq, item] for seq, (item, priority) in enumerate(queue.map.items())]
+            queue.positions = {entry[2]: entry for entry in queue.heap}
+            queue.seq = len(queue.heap)
+            heapq.heapify(queue.heap)
+            return queue
+        queue.heap = list(queue.map)
+        queue.keys = list(queue.map.values())
+        queue.positions = {item: index for index, item in enumerate(queue.heap)}
+        for index in reversed(range(len(queue.heap) // 2)):
+            queue._sift_down(index)
+        return queue
+    
+    def __len__(self):
+        return len(self.map)
+    
+    def contains(self, item):
+        return item in self.map  # O(1) check instead of O(n) heap search
     
     def push(self, item, priority):
-        heapq.heappush(self.heap, (priority, item))
-        self.in_heap.add(item)
+        # An item already queued just moves to its new priority
+        if item in self.map:
+            self.update_priority(item, priority)
+            return
         self.map[item] = priority
+        if self.lazy:
+            self._push_entry(item, priority)
+            return
+        self.heap.append(item)
+        self.keys.append(priority)
+        self._sift_up(len(self.heap) - 1)
     
-    def contains(self, item):
-        return item in self.in_heap  # O(1) check instead of O(n) heap search
+    def update_priority(self, item, priority):
+        old = self.map[item]  # KeyError if not queued
+        self.map[item] = priority
+        if self.lazy:
+            self._push_entry(item, priority)  # Supersedes the old entry
+            self._maybe_compact()
+            return
+        index = self.positions[item]
+        self.keys[index] = priority
+        if priority < old:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+    
+    def remove(self, item):
+        if item not in self.map:
+            return False
+        del self.map[item]
+        if self.lazy:
+            del self.positions[item]
+            self._maybe_compact()
+        else:
+            self._remove_at(self.positions[item])
+        return True
+    
+    def peek(self):
+        """(priority, item) with the lowest priority, left in place"""
+        if not self.map:
+            raise IndexError("peek from empty heap")
+        if self.lazy:
+            self._drop_stale()
+            priority, _, item = self.heap[0]
+            return priority, item
+        return self.keys[0], self.heap[0]
+    
+    def pop(self):
+        """Remove and return (priority, item) with the lowest priority"""
+        if not self.map:
+            raise IndexError("pop from empty heap")
+        if self.lazy:
+            self._drop_stale()
+            priority, _, item = heapq.heappop(self.heap)
+            del self.positions[item]
+        else:
+            priority, item = self.keys[0], self.heap[0]
+            self._remove_at(0)
+        del self.map[item]
+        return priority, item
+    
+    def _remove_at(self, index):
+        del self.positions[self.heap[index]]
+        item, priority = self.heap.pop(), self.keys.pop()
+        if index < len(self.heap):  # Fill the hole with the last entry and sift it to its place
+            self.heap[index], self.keys[index] = item, priority
+            self.positions[item] = index
+            if self._sift_down(index) == index:
+                self._sift_up(index)
+    
+    def _sift_up(self, index):
+        heap, keys, positions = self.heap, self.keys, self.positions
+        item, priority = heap[index], keys[index]
+        while index:
+            parent = (index - 1) >> 1
+            if not priority < keys[parent]:
+                break
+            heap[index], keys[index] = heap[parent], keys[parent]
+            positions[heap[index]] = index
+            index = parent
+        heap[index], keys[index] = item, priority
+        positions[item] = index
+        return index
+    
+    def _sift_down(self, index):
+        heap, keys, positions = self.heap, self.keys, self.positions
+        item, priority = heap[index], keys[index]
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if not keys[child] < priority:
+                break
+            heap[index], keys[index] = heap[child], keys[child]
+            positions[heap[index]] = index
+            index = child
+        heap[index], keys[index] = item, priority
+        positions[item] = index
+        return index
+    
+    # Lazy mode
+    def _push_entry(self, item, priority):
+        self.seq += 1  # Breaks priority ties so items are never compared
+        entry = [priority, self.seq, item]
+        self.positions[item] = entry
+        heapq.heappush(self.heap, entry)
+    
+    def _drop_stale(self):
+        while self.positions.get(self.heap[0][2]) is not self.heap[0]:
+            heapq.heappop(self.heap)
+    
+    def _maybe_compact(self):
+        stale = len(self.heap) - len(self.map)
+        if len(self.heap) > self.COMPACT_MIN and stale > self.compact_ratio * len(self.heap):
+            self.heap = list(self.positions.values())
+            heapq.heapify(self.heap)
 
 # Pattern 4: HashMap + Tree/Graph (Node References)
 class GraphNode:
@@ -66,22 +559,101 @@ class HashMapGraph:
             self.nodes[key2].neighbors.append(self.nodes[key1])
 
 # Pattern 5: HashMap + Stack/Queue (Position Tracking)
+_TOMBSTONE = object()
+
 class HashMapStack:
-    """HashMap tracks positions of elements in stack"""
-    def __init__(self):
+    """HashMap tracks positions of elements in stack, for O(1) removal by value.
+
+    Duplicates are allowed: each element maps to all of its indices. By default
+    order is kept: a removal leaves a tombstone that pop skips, and the stack is
+    compacted once tombstones fill half of it, so removal is amortized O(1).
+    With ordered=False it is a bag: the last element moves into the hole, so
+    only one index changes, but the order is lost.
+    """
+    def __init__(self, ordered=True):
+        self.ordered = ordered
         self.stack = []
-        self.positions = {}  # element -> index in stack
+        self.positions = {}  # element -> indices in stack (ascending list if ordered, else a set)
+        self.tombstones = 0
+    
+    def __len__(self):
+        return len(self.stack) - self.tombstones
+    
+    def __contains__(self, item):
+        return item in self.positions
+    
+    def __iter__(self):
+        # Bottom to top
+        return (item for item in self.stack if item is not _TOMBSTONE)
+    
+    def count(self, item):
+        return len(self.positions.get(item, ()))
     
     def push(self, item):
         self.stack.append(item)
-        self.positions[item] = len(self.stack) - 1
+        if self.ordered:
+            self.positions.setdefault(item, []).append(len(self.stack) - 1)
+        else:
+            self.positions.setdefault(item, set()).add(len(self.stack) - 1)
+    
+    def peek(self):
+        self._trim()
+        if not self.stack:
+            raise IndexError("peek from empty stack")
+        return self.stack[-1]
+    
+    def pop(self):
+        self._trim()
+        if not self.stack:
+            raise IndexError("pop from empty stack")
+        item = self.stack.pop()
+        indices = self.positions[item]
+        if self.ordered:
+            indices.pop()  # The top is always its highest index
+        else:
+            indices.discard(len(self.stack))
+        if not indices:
+            del self.positions[item]
+        return item
     
     def remove_by_value(self, item):
-        if item in self.positions:
-            # This is simplified - real implementation needs to handle
-            # position updates after removal
-            index = self.positions[item]
-            # Remove and update positions...
+        # Removes one occurrence: the topmost when ordered, any one otherwise
+        indices = self.positions.get(item)
+        if indices is None:
+            return False
+        index = indices.pop()
+        if not indices:
+            del self.positions[item]
+        last = len(self.stack) - 1
+        if self.ordered:
+            if index == last:
+                self.stack.pop()
+                self._trim()
+            else:
+                self.stack[index] = _TOMBSTONE
+                self.tombstones += 1
+                if 2 * self.tombstones > len(self.stack):
+                    self._compact()
+        else:
+            moved = self.stack.pop()
+            if index != last:  # Fill the hole with the old top and fix its one index
+                self.stack[index] = moved
+                moved_indices = self.positions[moved]
+                moved_indices.discard(last)
+                moved_indices.add(index)
+        return True
+    
+    def _trim(self):
+        while self.stack and self.stack[-1] is _TOMBSTONE:
+            self.stack.pop()
+            self.tombstones -= 1
+    
+    def _compact(self):
+        self.stack = [item for item in self.stack if item is not _TOMBSTONE]
+        self.tombstones = 0
+        self.positions = {}
+        for index, item in enumerate(self.stack):
+            self.positions.setdefault(item, []).append(index)
 
 # Pattern 6: Two HashMaps (Bidirectional Mapping)
 class BiDirectionalMap:
@@ -131,9 +703,214 @@ class BrowserHistory:
         self.current = min(len(self.history) - 1, self.current + steps)
         return self.history[self.current]
 
+# Benchmarks (run with: python Hashmap-Data-Structure_Linkage.py --bench)
+def check_caches_against_reference(ops=100_000, keys=64):
+    """Random gets, puts and deletes on LRU and LFU caches, checked against a brute-force model"""
+    import random
+    from collections import OrderedDict
+    
+    for cache_type in (HashMapLinkedList, LFUCache):
+        rng = random.Random(5)
+        now = [0.0]
+        cache = cache_type(capacity=16, max_bytes=200, sizer=lambda value: value, ttl=30, clock=lambda: now[0])
+        model = OrderedDict()  # key -> [value, expires, uses, last use], least recently used first
+        for step in range(ops):
+            now[0] += rng.random()
+            roll, key = rng.random(), rng.randrange(keys)
+            entry = model.get(key)
+            if entry is not None and entry[1] <= now[0]:
+                del model[key]
+                entry = None
+            if roll < 0.5:
+                assert cache.get(key) == (entry[0] if entry else None)
+                if entry:
+                    entry[2] += 1
+                    entry[3] = step
+                    model.move_to_end(key)
+            elif roll < 0.9:
+                value = rng.randint(1, 40)
+                cache.put(key, value)
+                uses = model.pop(key)[2] + 1 if entry else 1
+                while len(model) >= 16 or sum(entry[0] for entry in model.values()) + value > 200:
+                    if cache_type is LFUCache:
+                        victim = min(model, key=lambda other: (model[other][2], model[other][3]))
+                    else:
+                        victim = next(iter(model))
+                    del model[victim]
+                model[key] = [value, now[0] + 30, uses, step]
+            else:
+                assert cache.delete(key) == (entry is not None)
+                model.pop(key, None)
+            assert all(cache.map[key].value == entry[0] for key, entry in model.items())
+            assert all(key in model or cache.map[key].expires <= now[0] for key in cache.map)
+        print(f"{cache_type.__name__} matches the reference model over {ops:,} random operations, {cache.stats}")
+
+def benchmark_sharded_cache(threads=8, ops=400_000, keys=100_000, shard_counts=(1, 4, 16, 64)):
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+    
+    rng = random.Random(1)
+    workload = [(rng.random() < 0.1, int(rng.paretovariate(1.2)) % keys) for _ in range(ops)]  # 90% reads
+    chunks = [workload[i::threads] for i in range(threads)]
+    
+    def run(cache):
+        def worker(chunk):
+            for write, key in chunk:
+                if write:
+                    cache.put(key, key)
+                else:
+                    cache.get(key)
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, chunks))
+        return ops / (time.perf_counter() - began)
+    
+    lru, lock = HashMapLinkedList(capacity=keys // 10), threading.Lock()
+    class OneLock:
+        def get(self, key):
+            with lock:
+                return lru.get(key)
+        def put(self, key, value):
+            with lock:
+                lru.put(key, value)
+    print(f"single lock: {run(OneLock()):,.0f} ops/s with {threads} threads")
+    for shards in shard_counts:
+        cache = ShardedCache(shards=shards, capacity=keys // 10)
+        throughput = run(cache)
+        print(f"{shards} shards: {throughput:,.0f} ops/s, hit rate {cache.stats.hit_rate:.2f}")
+    
+    calls = []
+    def slow_loader(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return key
+    cache = ShardedCache(shards=16)
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        list(pool.map(lambda _: cache.get_or_load("hot", slow_loader), range(32)))
+    print(f"get_or_load: 32 concurrent misses -> {len(calls)} loader call(s)")
+
+def benchmark_dijkstra(nodes=200_000, edges_per_node=8):
+    import random
+    
+    rng = random.Random(2)
+    graph = [[(rng.randrange(nodes), rng.randint(1, 1000)) for _ in range(edges_per_node)] for _ in range(nodes)]
+    
+    def with_heapq():
+        # Push a duplicate on every improvement and skip the stale ones on pop
+        dist, heap, largest = {0: 0}, [(0, 0)], 1
+        done = set()
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbor, weight in graph[node]:
+                if neighbor not in dist or d + weight < dist[neighbor]:
+                    dist[neighbor] = d + weight
+                    heapq.heappush(heap, (d + weight, neighbor))
+                    largest = max(largest, len(heap))
+        return dist, largest
+    
+    def with_indexed(lazy):
+        dist, queue, largest = {0: 0}, HashMapHeap(lazy=lazy), 1
+        queue.push(0, 0)
+        while queue:
+            d, node = queue.pop()
+            for neighbor, weight in graph[node]:
+                if neighbor not in dist or d + weight < dist[neighbor]:
+                    dist[neighbor] = d + weight
+                    queue.push(neighbor, d + weight)  # Decrease-key when already queued
+                    largest = max(largest, len(queue.heap))
+        return dist, largest
+    
+    results = []
+    for label, run in (("heapq + duplicates", with_heapq), ("indexed heap", lambda: with_indexed(False)),
+                       ("indexed heap, lazy", lambda: with_indexed(True))):
+        began = time.perf_counter()
+        dist, largest = run()
+        print(f"{label}: {time.perf_counter() - began:.2f}s, largest heap {largest:,} entries")
+        results.append(dist)
+    assert results[0] == results[1] == results[2]
+
+def check_stack_against_list(ops=200_000, values=1_000):
+    """Random pushes, pops and removals on both HashMapStack modes, checked against a plain list"""
+    import random
+    from collections import Counter
+    
+    for ordered in (True, False):
+        rng = random.Random(3)
+        stack, reference = HashMapStack(ordered=ordered), []
+        for step in range(ops):
+            roll, item = rng.random(), rng.randrange(values)
+            if roll < 0.5:
+                stack.push(item)
+                reference.append(item)
+            elif roll < 0.65:
+                if reference:
+                    popped = stack.pop()
+                    assert not ordered or popped == reference[-1]
+                    reference.remove(popped) if not ordered else reference.pop()
+            else:
+                removed = stack.remove_by_value(item)
+                assert removed == (item in reference)
+                if removed:  # Topmost occurrence
+                    del reference[len(reference) - 1 - reference[::-1].index(item)]
+            if step % 1_000 == 0:
+                if ordered:
+                    assert list(stack) == reference
+                else:
+                    assert Counter(stack) == Counter(reference)
+                assert len(stack) == len(reference)
+                assert all(stack.stack[index] == value
+                           for value, indices in stack.positions.items() for index in indices)
+        print(f"{'ordered' if ordered else 'bag'} HashMapStack matches a list over {ops:,} random operations")
+
+def benchmark_stack_removal(size=200_000, removals=20_000, duplicates=4):
+    import random
+    
+    rng = random.Random(4)
+    items = [rng.randrange(size // duplicates) for _ in range(size)]
+    targets = [rng.choice(items) for _ in range(removals)]
+    for label, make in (("ordered", lambda: HashMapStack()), ("bag", lambda: HashMapStack(ordered=False))):
+        stack = make()
+        for item in items:
+            stack.push(item)
+        began = time.perf_counter()
+        for item in targets:
+            stack.remove_by_value(item)
+        print(f"{label} remove_by_value: {(time.perf_counter() - began) / removals * 1e6:.2f} us")
+    
+    reference = list(items)
+    began = time.perf_counter()
+    for item in targets[:removals // 20]:
+        if item in reference:
+            reference.remove(item)
+    print(f"list.remove: {(time.perf_counter() - began) / (removals // 20) * 1e6:.2f} us")
+
 # Test the patterns
 if __name__ == "__main__":
-    print("=== HashMap + Array Pattern ===")
+    print("=== HashMap + Linked List Pattern ===")
+    lru = HashMapLinkedList(capacity=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    lru.get("a")
+    lru.put("c", 3)  # Evicts "b", the least recently used
+    print(f"LRU keys: {[node.key for node in lru.list]}")
+    lfu = LFUCache(capacity=2)
+    lfu.put("a", 1)
+    lfu.get("a")
+    lfu.put("b", 2)
+    lfu.put("c", 3)  # Evicts "b", used fewer times than "a"
+    print(f"LFU has a: {'a' in lfu}, b: {'b' in lfu}, c: {'c' in lfu}")
+    
+    @memoize(HashMapLinkedList(capacity=100))
+    def fib(n):
+        return n if n < 2 else fib(n - 1) + fib(n - 2)
+    print(f"fib(80): {fib(80)}, {fib.cache.stats}")
+    sharded = ShardedCache(shards=4, capacity=100)
+    print(f"get_or_load: {sharded.get_or_load('user1', lambda key: key.upper())}, cached: {'user1' in sharded}")
+    
+    print("\n=== HashMap + Array Pattern ===")
     hash_arr = HashMapArray()
     hash_arr.add("user1", "Alice")
     hash_arr.add("user2", "Bob")
@@ -141,6 +918,19 @@ if __name__ == "__main__":
     print(f"Array: {hash_arr.arr}")
     print(f"Map: {hash_arr.map}")
     
+    print("\n=== HashMap + Heap Pattern ===")
+    tasks = HashMapHeap.heapify_from([("write", 3), ("test", 2), ("deploy", 5)])
+    tasks.update_priority("deploy", 1)
+    tasks.remove("test")
+    print(f"Pop: {tasks.pop()}, peek: {tasks.peek()}, size: {len(tasks)}")
+    
+    print("\n=== HashMap + Stack Pattern ===")
+    stack = HashMapStack()
+    for page in ("home", "search", "home", "cart"):
+        stack.push(page)
+    stack.remove_by_value("home")  # Drops the topmost "home"
+    print(f"Stack: {list(stack)}, top: {stack.peek()}")
+    
     print("\n=== Bidirectional Map Pattern ===")
     bimap = BiDirectionalMap()
     bimap.put("name", "Alice")
@@ -155,4 +945,11 @@ if __name__ == "__main__":
     print(f"Back 1: {browser.back(1)}")
     print(f"Forward 1: {browser.forward(1)}")
     print(f"Current history: {browser.history}")
-    print(f"Current position: {browser.current}")
\ No newline at end of file
+    print(f"Current position: {browser.current}")
+    
+    if "--bench" in sys.argv:
+        check_caches_against_reference()
+        benchmark_sharded_cache()
+        benchmark_dijkstra()
+        check_stack_against_list()
+        benchmark_stack_removal()
@@ -14,12 +14,15 @@ class RoomStatus(Enum):
     OUT_OF_ORDER = "out_of_order"
 
 class Room:
+    __slots__ = ('room_number', 'floor', 'room_type', 'price_per_night', 'status', 'observers')
+    
     def __init__(self, room_number: int, floor: int, room_type: RoomType, price_per_night: float):
         self.room_number = room_number
         self.floor = floor
         self.room_type = room_type
         self.price_per_night = price_per_night
         self.status = RoomStatus.AVAILABLE
+        self.observers: list = []  # Notified with room_status_changed(room, old_status)
     
     # Getters
     def get_room_number(self) -> int:
@@ -38,22 +41,36 @@ class Room:
         return self.price_per_night
     
     # Status management
+    def add_observer(self, observer):
+        self.observers.append(observer)
+    
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+    
+    def _set_status(self, status: RoomStatus):
+        old_status = self.status
+        self.status = status
+        for observer in self.observers:
+            observer.room_status_changed(self, old_status)
+    
     def mark_occupied(self):
-        self.status = RoomStatus.OCCUPIED
+        self._set_status(RoomStatus.OCCUPIED)
     
     def mark_cleaning(self):
-        self.status = RoomStatus.CLEANING
+        self._set_status(RoomStatus.CLEANING)
     
     def mark_available(self):
-        self.status = RoomStatus.AVAILABLE
+        self._set_status(RoomStatus.AVAILABLE)
     
     def mark_out_of_order(self):
-        self.status = RoomStatus.OUT_OF_ORDER
+        self._set_status(RoomStatus.OUT_OF_ORDER)
     
     def is_available(self) -> bool:
         return self.status == RoomStatus.AVAILABLE
 
 class Guest:
+    __slots__ = ('guest_id', 'name', 'email', 'phone')
+    
     def __init__(self, guest_id: int, name: str, email: str, phone: str):
         self.guest_id = guest_id
         self.name = name
@@ -81,9 +98,19 @@ class Guest:
         self.phone = phone
 
 
-from datetime import datetime, date
-from typing import List, Optional
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from contextlib import nullcontext
+from array import array
+import asyncio
+import bisect
+import heapq
+import mmap
+import os
+import struct
+import threading
 import uuid
+import zlib
 
 # New classes added below:
 
@@ -95,6 +122,8 @@ class ReservationStatus(Enum):
     CANCELLED = "cancelled"
 
 class Reservation:
+    __slots__ = ('reservation_id', 'guest', 'room', 'check_in_date', 'check_out_date', 'total_price', 'status')
+    
     def __init__(self, reservation_id: str, guest: Guest, room: Room, 
                  check_in_date: date, check_out_date: date, total_price: float):
         self.reservation_id = reservation_id
@@ -126,78 +155,428 @@ class Reservation:
     def cancel(self):
         self.status = ReservationStatus.CANCELLED
 
-class ReservationManager:
+class HotelObserver:
+    """Receives room and reservation events; override the ones you need"""
+    def room_added(self, room: Room):
+        pass
+    
+    def room_status_changed(self, room: Room, old_status: RoomStatus):
+        pass
+    
+    def reservation_created(self, reservation: Reservation):
+        pass
+    
+    def reservation_status_changed(self, reservation: Reservation, old_status: ReservationStatus):
+        pass
+
+class ReservationStore:
+    """Columnar reservation history.
+
+    Each field lives in its own typed array (room number, guest id, ordinal
+    check-in/check-out day, status code, price, 16-byte uuid), so a stored
+    reservation costs a few dozen bytes instead of a full object graph.
+    Indexing returns a ReservationView with the Reservation getter API.
+    """
+    STATUSES = list(ReservationStatus)
+    STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+    
     def __init__(self):
+        self.room_numbers = array('l')
+        self.guest_ids = array('q')
+        self.check_in_days = array('l')
+        self.check_out_days = array('l')
+        self.status_codes = array('b')
+        self.prices = array('d')
+        self.id_bytes = bytearray()  # uuid.bytes per row
+        self.row_by_id: Optional[Dict[bytes, int]] = None  # Built on the first find()
+        self.rooms: Dict[int, Room] = {}  # room_number -> Room, shared by all rows
+        self.guests: Dict[int, Guest] = {}  # guest_id -> Guest, shared by all rows
+    
+    @classmethod
+    def from_reservations(cls, reservations: Iterable[Reservation]) -> 'ReservationStore':
+        store = cls()
+        for reservation in reservations:
+            store.append(reservation)
+        return store
+    
+    def append(self, reservation: Reservation) -> 'ReservationView':
+        reservation_uuid = uuid.UUID(reservation.get_reservation_id())
+        room, guest = reservation.get_room(), reservation.get_guest()
+        self.rooms.setdefault(room.get_room_number(), room)
+        self.guests.setdefault(guest.get_guest_id(), guest)
+        
+        row = len(self.prices)
+        self.room_numbers.append(room.get_room_number())
+        self.guest_ids.append(guest.get_guest_id())
+        self.check_in_days.append(reservation.get_check_in_date().toordinal())
+        self.check_out_days.append(reservation.get_check_out_date().toordinal())
+        self.status_codes.append(self.STATUS_CODES[reservation.get_status()])
+        self.prices.append(reservation.total_price)
+        self.id_bytes += reservation_uuid.bytes
+        if self.row_by_id is not None:
+            self.row_by_id[reservation_uuid.bytes] = row
+        return ReservationView(self, row)
+    
+    def find(self, reservation_id: str) -> Optional['ReservationView']:
+        if self.row_by_id is None:
+            # Pure history archives never pay for the id index
+            ids = self.id_bytes
+            self.row_by_id = {bytes(ids[start:start + 16]): start // 16 for start in range(0, len(ids), 16)}
+        row = self.row_by_id.get(uuid.UUID(reservation_id).bytes)
+        return None if row is None else ReservationView(self, row)
+    
+    def __len__(self) -> int:
+        return len(self.prices)
+    
+    def __getitem__(self, row: int) -> 'ReservationView':
+        if not 0 <= row < len(self.prices):
+            raise IndexError("reservation row out of range")
+        return ReservationView(self, row)
+    
+    def __iter__(self) -> Iterator['ReservationView']:
+        for row in range(len(self.prices)):
+            yield ReservationView(self, row)
+
+class ReservationView:
+    """Lightweight handle on one ReservationStore row"""
+    __slots__ = ('store', 'row')
+    
+    def __init__(self, store: ReservationStore, row: int):
+        self.store = store
+        self.row = row
+    
+    def get_reservation_id(self) -> str:
+        start = self.row * 16
+        return str(uuid.UUID(bytes=bytes(self.store.id_bytes[start:start + 16])))
+    
+    def get_guest(self) -> Guest:
+        return self.store.guests[self.store.guest_ids[self.row]]
+    
+    def get_room(self) -> Room:
+        return self.store.rooms[self.store.room_numbers[self.row]]
+    
+    def get_check_in_date(self) -> date:
+        return date.fromordinal(self.store.check_in_days[self.row])
+    
+    def get_check_out_date(self) -> date:
+        return date.fromordinal(self.store.check_out_days[self.row])
+    
+    def get_status(self) -> ReservationStatus:
+        return ReservationStore.STATUSES[self.store.status_codes[self.row]]
+    
+    @property
+    def status(self) -> ReservationStatus:
+        return self.get_status()
+    
+    @status.setter
+    def status(self, status: ReservationStatus):
+        self.store.status_codes[self.row] = ReservationStore.STATUS_CODES[status]
+    
+    @property
+    def total_price(self) -> float:
+        return self.store.prices[self.row]
+    
+    def cancel(self):
+        self.status = ReservationStatus.CANCELLED
+
+# Statuses that block a room for their date range
+ACTIVE_RESERVATION_STATUSES = (ReservationStatus.CONFIRMED, ReservationStatus.CHECKED_IN)
+
+class RoomReservationIndex:
+    """Active reservations of one room, sorted by check-in date.
+
+    Reservations on the same room never overlap, so sorting by check-in also
+    sorts by check-out and an overlap check only needs to look at the one
+    reservation that starts right before the requested check-out.
+
+    Writers grow `entries` before `check_ins` and shrink it after, so a reader
+    racing a writer may get a stale answer but never an IndexError.
+    """
+    def __init__(self):
+        self.check_ins: List[date] = []
+        self.entries: List[Reservation] = []
+    
+    def add(self, reservation: Reservation):
+        position = bisect.bisect_right(self.check_ins, reservation.get_check_in_date())
+        self.entries.insert(position, reservation)
+        self.check_ins.insert(position, reservation.get_check_in_date())
+    
+    def remove(self, reservation: Reservation) -> bool:
+        check_in = reservation.get_check_in_date()
+        position = bisect.bisect_left(self.check_ins, check_in)
+        while position < len(self.entries) and self.check_ins[position] == check_in:
+            if self.entries[position] is reservation:
+                del self.check_ins[position]
+                del self.entries[position]
+                return True
+            position += 1
+        return False
+    
+    def is_free(self, check_in: date, check_out: date) -> bool:
+        """O(log n) check that no active reservation overlaps [check_in, check_out)"""
+        position = bisect.bisect_left(self.check_ins, check_out)
+        if position == 0:
+            return True
+        return self.entries[position - 1].get_check_out_date() <= check_in
+    
+    def next_check_in(self, on_or_after: date) -> Optional[date]:
+        position = bisect.bisect_left(self.check_ins, on_or_after)
+        return self.check_ins[position] if position < len(self.check_ins) else None
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class OccupancyBitmap:
+    """Availability engine keeping one occupancy bitmask per room type per night.
+
+    Bit i of a night's mask is set when the i-th room of that type (in the order
+    rooms were added) is booked that night. Python ints work as arbitrary-width
+    bitsets, so "any free SUITE from A to B" is an OR of the masks over the
+    nights followed by a find-first-clear-bit, with no per-room loop.
+    """
+    def __init__(self):
+        self.rooms_by_type: Dict[RoomType, List[Room]] = {}
+        self.bit_by_room: Dict[int, int] = {}  # room_number -> bit position within its type
+        self.night_masks: Dict[RoomType, Dict[int, int]] = {}  # type -> date ordinal -> occupied mask
+        self.type_locks: Dict[RoomType, threading.Lock] = {}  # Rooms of one type share their masks
+    
+    def add_room(self, room: Room):
+        room_type = room.get_room_type()
+        if room_type not in self.rooms_by_type:
+            self.rooms_by_type[room_type] = []
+            self.night_masks[room_type] = {}
+            self.type_locks[room_type] = threading.Lock()
+        self.bit_by_room[room.get_room_number()] = len(self.rooms_by_type[room_type])
+        self.rooms_by_type[room_type].append(room)
+    
+    def book(self, reservation: Reservation):
+        room = reservation.get_room()
+        bit = 1 << self.bit_by_room[room.get_room_number()]
+        masks = self.night_masks[room.get_room_type()]
+        with self.type_locks[room.get_room_type()]:
+            for night in range(reservation.get_check_in_date().toordinal(),
+                               reservation.get_check_out_date().toordinal()):
+                masks[night] = masks.get(night, 0) | bit
+    
+    def release(self, reservation: Reservation):
+        room = reservation.get_room()
+        bit = 1 << self.bit_by_room[room.get_room_number()]
+        masks = self.night_masks[room.get_room_type()]
+        with self.type_locks[room.get_room_type()]:
+            for night in range(reservation.get_check_in_date().toordinal(),
+                               reservation.get_check_out_date().toordinal()):
+                mask = masks.get(night, 0) & ~bit
+                if mask:
+                    masks[night] = mask
+                else:
+                    masks.pop(night, None)  # Keep the map sparse
+    
+    def occupied_mask(self, room_type: RoomType, check_in: date, check_out: date) -> int:
+        masks = self.night_masks.get(room_type, {})
+        occupied = 0
+        for night in range(check_in.toordinal(), check_out.toordinal()):
+            occupied |= masks.get(night, 0)
+        return occupied
+    
+    def find_free_room(self, room_type: RoomType, check_in: date, check_out: date) -> Optional[Room]:
+        rooms = self.rooms_by_type.get(room_type)
+        if not rooms:
+            return None
+        free = ((1 << len(rooms)) - 1) & ~self.occupied_mask(room_type, check_in, check_out)
+        if not free:
+            return None
+        return rooms[(free & -free).bit_length() - 1]  # Lowest set bit = first free room
+    
+    def find_free_rooms(self, room_type: RoomType, check_in: date, check_out: date,
+                        limit: Optional[int] = None) -> List[Room]:
+        rooms = self.rooms_by_type.get(room_type)
+        if not rooms:
+            return []
+        free = ((1 << len(rooms)) - 1) & ~self.occupied_mask(room_type, check_in, check_out)
+        found = []
+        while free and (limit is None or len(found) < limit):
+            lowest = free & -free
+            found.append(rooms[lowest.bit_length() - 1])
+            free ^= lowest
+        return found
+
+class ReservationManager:
+    """Owns rooms and reservations.
+
+    With `concurrent=True` every write to a room's bookings happens under that
+    room's lock. Searches run without locks; a booking re-checks its chosen room
+    under the lock and retries with a fresh search if another thread took it.
+    """
+    def __init__(self, use_occupancy_bitmap: bool = False, concurrent: bool = False,
+                 max_booking_retries: int = 16):
         self.reservations: List[Reservation] = []
         self.rooms: List[Room] = []  # Or inject this as dependency
+        self.concurrent = concurrent
+        self.max_booking_retries = max_booking_retries
+        self.room_locks: Dict[int, threading.Lock] = {}  # room_number -> lock (concurrent mode)
+        self.occupancy: Optional[OccupancyBitmap] = OccupancyBitmap() if use_occupancy_bitmap else None
+        self.room_index: Dict[int, RoomReservationIndex] = {}  # room_number -> active reservations
+        self.reservations_by_id: Dict[str, Reservation] = {}
+        self.reservations_by_guest: Dict[int, List[Reservation]] = {}  # guest_id -> reservations
+        self.observers: List[HotelObserver] = []
+    
+    def add_observer(self, observer: HotelObserver):
+        self.observers.append(observer)
+    
+    def remove_observer(self, observer: HotelObserver):
+        self.observers.remove(observer)
+    
+    def add_room(self, room: Room):
+        self.room_locks[room.get_room_number()] = threading.Lock()
+        self.rooms.append(room)
+        if self.occupancy is not None:
+            self.occupancy.add_room(room)
+        for observer in self.observers:
+            observer.room_added(room)
     
     def make_reservation(self, guest: Guest, room_type: RoomType, 
                         check_in_date: date, check_out_date: date) -> Optional[Reservation]:
         """Create a new reservation if room is available"""
+        self.validate_dates(check_in_date, check_out_date)
         
-        # Validate dates
+        attempts = self.max_booking_retries if self.concurrent else 1
+        for _ in range(attempts):
+            # Find available room
+            available_room = self._find_available_room(room_type, check_in_date, check_out_date)
+            if not available_room:
+                return None  # No rooms available
+            
+            reservation = self.reserve_room(guest, available_room, check_in_date, check_out_date)
+            if reservation:
+                return reservation
+            # Another thread booked the room since the search; look again
+        return None
+    
+    def validate_dates(self, check_in_date: date, check_out_date: date):
         if check_in_date >= check_out_date:
             raise ValueError("Check-in date must be before check-out date")
         
         if check_in_date < date.today():
             raise ValueError("Check-in date cannot be in the past")
-        
-        # Find available room
-        available_room = self._find_available_room(room_type, check_in_date, check_out_date)
-        if not available_room:
-            return None  # No rooms available
-        
+    
+    def reserve_room(self, guest: Guest, room: Room, check_in_date: date,
+                     check_out_date: date) -> Optional[Reservation]:
+        """Book a specific room, or return None if it is no longer free"""
+        with self._lock_for(room):
+            if not self._is_room_available(room, check_in_date, check_out_date):
+                return None
+            return self._book_room(guest, room, check_in_date, check_out_date)
+    
+    def _book_room(self, guest: Guest, room: Room, check_in_date: date, check_out_date: date) -> Reservation:
+        """Create and store a reservation for a room already known to be free"""
         # Calculate total price
         nights = (check_out_date - check_in_date).days
-        total_price = nights * available_room.get_price_per_night()
+        total_price = nights * room.get_price_per_night()
         
         # Create reservation
         reservation_id = str(uuid.uuid4())
         reservation = Reservation(
             reservation_id=reservation_id,
             guest=guest,
-            room=available_room,
+            room=room,
             check_in_date=check_in_date,
             check_out_date=check_out_date,
             total_price=total_price
         )
         
-        self.reservations.append(reservation)
+        self._store_reservation(reservation)
         return reservation
     
+    def _lock_for(self, room: Room):
+        if not self.concurrent:
+            return nullcontext()
+        lock = self.room_locks.get(room.get_room_number())
+        if lock is None:
+            # Room appended to self.rooms directly instead of through add_room
+            lock = self.room_locks.setdefault(room.get_room_number(), threading.Lock())
+        return lock
+    
+    def _store_reservation(self, reservation: Reservation):
+        """Record a new reservation in the history list and every index"""
+        self.reservations.append(reservation)
+        self.reservations_by_id[reservation.get_reservation_id()] = reservation
+        guest_id = reservation.get_guest().get_guest_id()
+        self.reservations_by_guest.setdefault(guest_id, []).append(reservation)
+        if reservation.get_status() in ACTIVE_RESERVATION_STATUSES:
+            self._index_reservation(reservation)
+        for observer in self.observers:
+            observer.reservation_created(reservation)
+    
     def find_reservation_by_id(self, reservation_id: str) -> Optional[Reservation]:
         """Find reservation by ID"""
-        for reservation in self.reservations:
-            if reservation.get_reservation_id() == reservation_id:
-                return reservation
-        return None
+        return self.reservations_by_id.get(reservation_id)
     
     def find_reservations_by_guest(self, guest_id: int) -> List[Reservation]:
         """Find all reservations for a guest"""
-        guest_reservations = []
-        for reservation in self.reservations:
-            if reservation.get_guest().get_guest_id() == guest_id:
-                guest_reservations.append(reservation)
-        return guest_reservations
+        return list(self.reservations_by_guest.get(guest_id, []))
     
     def cancel_reservation(self, reservation_id: str) -> bool:
         """Cancel a reservation"""
+        return self.transition_reservation(
+            reservation_id, [ReservationStatus.PENDING, ReservationStatus.CONFIRMED], ReservationStatus.CANCELLED
+        ) is not None
+    
+    def transition_reservation(self, reservation_id: str, allowed_from: Iterable[ReservationStatus],
+                               status: ReservationStatus) -> Optional[Reservation]:
+        """Move a reservation to `status` only if it is currently in `allowed_from`"""
         reservation = self.find_reservation_by_id(reservation_id)
-        if reservation and reservation.get_status() in [ReservationStatus.PENDING, ReservationStatus.CONFIRMED]:
-            reservation.cancel()
-            return True
-        return False
+        if not reservation:
+            return None
+        with self._lock_for(reservation.get_room()):
+            if reservation.get_status() not in allowed_from:
+                return None
+            self.update_reservation_status(reservation, status)
+        return reservation
+    
+    def update_reservation_status(self, reservation: Reservation, status: ReservationStatus):
+        """Move a reservation to a new status, keeping the room index in sync"""
+        old_status = reservation.get_status()
+        was_active = old_status in ACTIVE_RESERVATION_STATUSES
+        reservation.status = status
+        is_active = status in ACTIVE_RESERVATION_STATUSES
+        if was_active and not is_active:
+            self._unindex_reservation(reservation)
+        elif is_active and not was_active:
+            self._index_reservation(reservation)
+        for observer in self.observers:
+            observer.reservation_status_changed(reservation, old_status)
     
     def _find_available_room(self, room_type: RoomType, check_in: date, check_out: date) -> Optional[Room]:
         """Find an available room of specified type for given dates"""
+        if self.occupancy is not None:
+            return self.occupancy.find_free_room(room_type, check_in, check_out)
         for room in self.rooms:
             if (room.get_room_type() == room_type and 
                 self._is_room_available(room, check_in, check_out)):
                 return room
         return None
     
+    def find_available_rooms(self, room_type: RoomType, check_in: date, check_out: date,
+                             limit: Optional[int] = None) -> List[Room]:
+        """Up to `limit` free rooms of a type, in the order _find_available_room would pick them"""
+        if self.occupancy is not None:
+            return self.occupancy.find_free_rooms(room_type, check_in, check_out, limit)
+        found = []
+        for room in self.rooms:
+            if limit is not None and len(found) >= limit:
+                break
+            if (room.get_room_type() == room_type and 
+                self._is_room_available(room, check_in, check_out)):
+                found.append(room)
+        return found
+    
     def _is_room_available(self, room: Room, check_in: date, check_out: date) -> bool:
         """Check if room is available for given date range"""
+        index = self.room_index.get(room.get_room_number())
+        return index is None or index.is_free(check_in, check_out)
+    
+    def _is_room_available_scan(self, room: Room, check_in: date, check_out: date) -> bool:
+        """Linear-scan reference for _is_room_available"""
         for reservation in self.reservations:
             if (reservation.get_room().get_room_number() == room.get_room_number() and
                 reservation.get_status() in [ReservationStatus.CONFIRMED, ReservationStatus.CHECKED_IN] and
@@ -206,37 +585,350 @@ class ReservationManager:
                 return False
         return True
     
+    def _index_reservation(self, reservation: Reservation):
+        room_number = reservation.get_room().get_room_number()
+        if room_number not in self.room_index:
+            self.room_index[room_number] = RoomReservationIndex()
+        self.room_index[room_number].add(reservation)
+        if self.occupancy is not None:
+            self.occupancy.book(reservation)
+    
+    def _unindex_reservation(self, reservation: Reservation):
+        index = self.room_index.get(reservation.get_room().get_room_number())
+        if index is not None and index.remove(reservation) and self.occupancy is not None:
+            self.occupancy.release(reservation)
+    
     def _dates_overlap(self, start1: date, end1: date, start2: date, end2: date) -> bool:
         """Check if two date ranges overlap"""
         return start1 < end2 and start2 < end1
+    
+    # Bulk availability
+    def availability_matrix(self, start: date, end: date,
+                            room_types: Optional[List[RoomType]] = None) -> Dict[RoomType, List[int]]:
+        """Free-room count per room type for every night in [start, end).
+
+        Built in one pass: each room's index is bisected to the window and every
+        overlapping reservation adds a -1/+1 pair to a per-type difference array,
+        which a running sum turns into nightly counts.
+        """
+        if start >= end:
+            raise ValueError("Start date must be before end date")
+        nights = (end - start).days
+        types = list(room_types) if room_types is not None else list(RoomType)
+        room_counts = {room_type: 0 for room_type in types}
+        deltas = {room_type: [0] * (nights + 1) for room_type in types}
+        
+        for room in self.rooms:
+            room_type = room.get_room_type()
+            if room_type not in deltas:
+                continue
+            room_counts[room_type] += 1
+            index = self.room_index.get(room.get_room_number())
+            if not index:
+                continue
+            # The reservation starting at or before `start` may still cover it
+            first = max(bisect.bisect_right(index.check_ins, start) - 1, 0)
+            last = bisect.bisect_left(index.check_ins, end)
+            delta = deltas[room_type]
+            for reservation in index.entries[first:last]:
+                booked_from = max(reservation.get_check_in_date(), start)
+                booked_until = min(reservation.get_check_out_date(), end)
+                if booked_from < booked_until:
+                    delta[(booked_from - start).days] -= 1
+                    delta[(booked_until - start).days] += 1
+        
+        matrix = {}
+        for room_type in types:
+            free = room_counts[room_type]
+            counts = []
+            for change in deltas[room_type][:nights]:
+                free += change
+                counts.append(free)
+            matrix[room_type] = counts
+        return matrix
+    
+    def iter_availability(self, start: date, end: date, room_types: Optional[List[RoomType]] = None,
+                          chunk_days: int = 31) -> Iterator[Tuple[date, Dict[RoomType, int]]]:
+        """Stream (night, {room_type: free_rooms}) for long horizons, one chunk in memory at a time"""
+        if chunk_days <= 0:
+            raise ValueError("chunk_days must be positive")
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+            matrix = self.availability_matrix(chunk_start, chunk_end, room_types)
+            for offset in range((chunk_end - chunk_start).days):
+                yield (chunk_start + timedelta(days=offset),
+                       {room_type: counts[offset] for room_type, counts in matrix.items()})
+            chunk_start = chunk_end
+
+class HousekeepingIndex(HotelObserver):
+    """Incrementally maintained room-status index for housekeeping.
+
+    Keeps the set of room numbers in each RoomStatus, per-floor and per-type
+    status counters, and a heap of rooms in CLEANING ordered by their next
+    arrival's check-in date, so the room needed soonest is cleaned first.
+    Room.mark_* calls reach it through the observer hooks; heap entries that no
+    longer match the room's state are skipped lazily.
+    """
+    NO_ARRIVAL = date.max.toordinal()
+    
+    def __init__(self, reservation_manager: ReservationManager):
+        self.reservation_manager = reservation_manager
+        self.rooms: Dict[int, Room] = {}
+        self.rooms_by_status: Dict[RoomStatus, Set[int]] = {status: set() for status in RoomStatus}
+        self.floor_counts: Dict[Tuple[int, RoomStatus], int] = {}
+        self.type_counts: Dict[Tuple[RoomType, RoomStatus], int] = {}
+        self.cleaning_queue: List[Tuple[int, int]] = []  # (next arrival ordinal, room number)
+        self.cleaning_priority: Dict[int, int] = {}  # room number -> live priority in cleaning_queue
+        self.lock = threading.Lock()
+        reservation_manager.add_observer(self)
+        for room in reservation_manager.rooms:
+            self.room_added(room)
+    
+    # Queries
+    def rooms_with_status(self, status: RoomStatus) -> List[Room]:
+        with self.lock:
+            return [self.rooms[room_number] for room_number in self.rooms_by_status[status]]
+    
+    def count(self, status: RoomStatus, floor: Optional[int] = None, room_type: Optional[RoomType] = None) -> int:
+        """Rooms in `status`, optionally restricted to one floor or one room type"""
+        with self.lock:
+            if floor is not None:
+                return self.floor_counts.get((floor, status), 0)
+            if room_type is not None:
+                return self.type_counts.get((room_type, status), 0)
+            return len(self.rooms_by_status[status])
+    
+    def next_room_to_clean(self) -> Optional[Room]:
+        with self.lock:
+            self._drop_stale_jobs()
+            return self.rooms[self.cleaning_queue[0][1]] if self.cleaning_queue else None
+    
+    def release_next_cleaned_room(self) -> Optional[Room]:
+        """Mark the most urgent room in CLEANING as AVAILABLE and return it"""
+        room = self.next_room_to_clean()
+        if room:
+            room.mark_available()
+        return room
+    
+    # Observer hooks
+    def room_added(self, room: Room):
+        room.add_observer(self)
+        with self.lock:
+            self.rooms[room.get_room_number()] = room
+            self._count(room, room.get_status(), 1)
+            if room.get_status() == RoomStatus.CLEANING:
+                self._schedule_cleaning(room)
+    
+    def room_status_changed(self, room: Room, old_status: RoomStatus):
+        with self.lock:
+            self._count(room, old_status, -1)
+            self._count(room, room.get_status(), 1)
+            if room.get_status() == RoomStatus.CLEANING:
+                self._schedule_cleaning(room)
+            else:
+                self.cleaning_priority.pop(room.get_room_number(), None)
+    
+    def reservation_created(self, reservation: Reservation):
+        self._reprioritize(reservation.get_room())
+    
+    def reservation_status_changed(self, reservation: Reservation, old_status: ReservationStatus):
+        self._reprioritize(reservation.get_room())
+    
+    # Internals
+    def _count(self, room: Room, status: RoomStatus, change: int):
+        room_number = room.get_room_number()
+        if change > 0:
+            self.rooms_by_status[status].add(room_number)
+        else:
+            self.rooms_by_status[status].discard(room_number)
+        floor_key, type_key = (room.get_floor(), status), (room.get_room_type(), status)
+        self.floor_counts[floor_key] = self.floor_counts.get(floor_key, 0) + change
+        self.type_counts[type_key] = self.type_counts.get(type_key, 0) + change
+    
+    def _next_arrival(self, room: Room) -> int:
+        index = self.reservation_manager.room_index.get(room.get_room_number())
+        next_check_in = index.next_check_in(date.today()) if index else None
+        return next_check_in.toordinal() if next_check_in else self.NO_ARRIVAL
+    
+    def _schedule_cleaning(self, room: Room):
+        priority = self._next_arrival(room)
+        if self.cleaning_priority.get(room.get_room_number()) != priority:
+            self.cleaning_priority[room.get_room_number()] = priority
+            heapq.heappush(self.cleaning_queue, (priority, room.get_room_number()))
+            if len(self.cleaning_queue) > 2 * len(self.cleaning_priority) + 64:
+                # Too many stale entries: rebuild from the live priorities
+                self.cleaning_queue = [(p, number) for number, p in self.cleaning_priority.items()]
+                heapq.heapify(self.cleaning_queue)
+    
+    def _reprioritize(self, room: Room):
+        if room.get_room_number() in self.cleaning_priority:
+            with self.lock:
+                if room.get_room_number() in self.cleaning_priority:
+                    self._schedule_cleaning(room)
+    
+    def _drop_stale_jobs(self):
+        queue = self.cleaning_queue
+        while queue and self.cleaning_priority.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)
+
+class RangeSumTree:
+    """Fenwick tree with O(log n) range add and O(log n) range sum over day offsets"""
+    def __init__(self, size: int):
+        self.size = size
+        self.linear = [0.0] * (size + 1)
+        self.offset = [0.0] * (size + 1)
+    
+    def _add(self, tree: List[float], position: int, value: float):
+        position += 1
+        while position <= self.size:
+            tree[position] += value
+            position += position & -position
+    
+    def _prefix(self, tree: List[float], position: int) -> float:
+        total = 0.0
+        while position > 0:
+            total += tree[position]
+            position -= position & -position
+        return total
+    
+    def add_range(self, start: int, end: int, value: float):
+        """Add `value` to every day in [start, end)"""
+        self._add(self.linear, start, value)
+        self._add(self.offset, start, -value * start)
+        if end < self.size:
+            self._add(self.linear, end, -value)
+            self._add(self.offset, end, value * end)
+    
+    def prefix_sum(self, end: int) -> float:
+        """Sum over days [0, end)"""
+        return self._prefix(self.linear, end) * end + self._prefix(self.offset, end)
+    
+    def range_sum(self, start: int, end: int) -> float:
+        return self.prefix_sum(end) - self.prefix_sum(start)
+
+class RevenueAnalytics(HotelObserver):
+    """ADR, RevPAR and occupancy by room type and floor over a fixed date horizon.
+
+    Every sold night adds its nightly rate to a revenue tree and 1 to a
+    room-nights tree for the room's type and for its floor. Trees are updated as
+    reservations are created or cancelled. A range query is then two prefix sums
+    per group instead of a walk over the reservation history. Reservations are
+    clipped to [horizon_start, horizon_end).
+    """
+    SOLD_STATUSES = (ReservationStatus.CONFIRMED, ReservationStatus.CHECKED_IN, ReservationStatus.COMPLETED)
+    
+    def __init__(self, reservation_manager: ReservationManager, horizon_start: date, horizon_end: date):
+        if horizon_start >= horizon_end:
+            raise ValueError("Horizon start must be before horizon end")
+        self.horizon_start = horizon_start
+        self.horizon_end = horizon_end
+        self.days = (horizon_end - horizon_start).days
+        self.revenue: Dict[tuple, RangeSumTree] = {}  # ('type', RoomType) / ('floor', int) -> tree
+        self.nights_sold: Dict[tuple, RangeSumTree] = {}
+        self.room_counts: Dict[tuple, int] = {}
+        self.lock = threading.Lock()
+        for room in reservation_manager.rooms:
+            self.room_added(room)
+        for reservation in reservation_manager.reservations:
+            self.reservation_created(reservation)
+        reservation_manager.add_observer(self)
+    
+    # Queries
+    def metrics(self, start: date, end: date, room_type: Optional[RoomType] = None,
+                floor: Optional[int] = None) -> Dict[str, float]:
+        """Revenue metrics for [start, end) for one room type, one floor, or the whole hotel"""
+        if room_type is not None:
+            groups = [('type', room_type)]
+        elif floor is not None:
+            groups = [('floor', floor)]
+        else:
+            groups = [key for key in self.room_counts if key[0] == 'type']
+        first, last = self._clip(start), self._clip(end)
+        revenue = sum(self.revenue[key].range_sum(first, last) for key in groups if key in self.revenue)
+        sold = sum(self.nights_sold[key].range_sum(first, last) for key in groups if key in self.nights_sold)
+        available = sum(self.room_counts.get(key, 0) for key in groups) * max(last - first, 0)
+        return {
+            'revenue': revenue,
+            'room_nights_sold': round(sold),
+            'room_nights_available': available,
+            'occupancy': sold / available if available else 0.0,
+            'adr': revenue / sold if sold else 0.0,
+            'revpar': revenue / available if available else 0.0,
+        }
+    
+    def by_room_type(self, start: date, end: date) -> Dict[RoomType, Dict[str, float]]:
+        return {key[1]: self.metrics(start, end, room_type=key[1]) for key in self.room_counts if key[0] == 'type'}
+    
+    def by_floor(self, start: date, end: date) -> Dict[int, Dict[str, float]]:
+        return {key[1]: self.metrics(start, end, floor=key[1]) for key in self.room_counts if key[0] == 'floor'}
+    
+    # Observer hooks
+    def room_added(self, room: Room):
+        with self.lock:
+            for key in self._groups(room):
+                if key not in self.room_counts:
+                    self.room_counts[key] = 0
+                    self.revenue[key] = RangeSumTree(self.days)
+                    self.nights_sold[key] = RangeSumTree(self.days)
+                self.room_counts[key] += 1
+    
+    def reservation_created(self, reservation: Reservation):
+        if reservation.get_status() in self.SOLD_STATUSES:
+            self._record(reservation, 1)
+    
+    def reservation_status_changed(self, reservation: Reservation, old_status: ReservationStatus):
+        was_sold = old_status in self.SOLD_STATUSES
+        is_sold = reservation.get_status() in self.SOLD_STATUSES
+        if was_sold != is_sold:
+            self._record(reservation, 1 if is_sold else -1)
+    
+    # Internals
+    def _groups(self, room: Room) -> Tuple[tuple, tuple]:
+        return ('type', room.get_room_type()), ('floor', room.get_floor())
+    
+    def _clip(self, day: date) -> int:
+        return min(max((day - self.horizon_start).days, 0), self.days)
+    
+    def _record(self, reservation: Reservation, sign: int):
+        check_in, check_out = reservation.get_check_in_date(), reservation.get_check_out_date()
+        first, last = self._clip(check_in), self._clip(check_out)
+        if first >= last:
+            return
+        nightly_rate = reservation.total_price / (check_out - check_in).days
+        with self.lock:
+            for key in self._groups(reservation.get_room()):
+                self.revenue[key].add_range(first, last, sign * nightly_rate)
+                self.nights_sold[key].add_range(first, last, sign)
 
 class CheckInOutManager:
     def __init__(self, reservation_manager: ReservationManager):
         self.reservation_manager = reservation_manager
     
     def check_in(self, reservation_id: str) -> bool:
-        reservation = self.reservation_manager.find_reservation_by_id(reservation_id)
-        if reservation and reservation.get_status() == ReservationStatus.CONFIRMED:
-            reservation.status = ReservationStatus.CHECKED_IN
+        reservation = self.reservation_manager.transition_reservation(
+            reservation_id, [ReservationStatus.CONFIRMED], ReservationStatus.CHECKED_IN)
+        if reservation:
             reservation.get_room().mark_occupied()
             return True
         return False
     
     def check_out(self, reservation_id: str) -> bool:
-        reservation = self.reservation_manager.find_reservation_by_id(reservation_id)
-        if reservation and reservation.get_status() == ReservationStatus.CHECKED_IN:
-            reservation.status = ReservationStatus.COMPLETED
+        reservation = self.reservation_manager.transition_reservation(
+            reservation_id, [ReservationStatus.CHECKED_IN], ReservationStatus.COMPLETED)
+        if reservation:
             reservation.get_room().mark_cleaning()
             return True
         return False
 
 class HotelSystem:
-    def __init__(self):
-        self.reservation_manager = ReservationManager()
+    def __init__(self, use_occupancy_bitmap: bool = False, concurrent: bool = False):
+        self.reservation_manager = ReservationManager(use_occupancy_bitmap, concurrent)
         self.checkin_manager = CheckInOutManager(self.reservation_manager)
+        self.housekeeping = HousekeepingIndex(self.reservation_manager)
     
     def add_room(self, room: Room):
-        self.reservation_manager.rooms.append(room)
+        self.reservation_manager.add_room(room)
     
     def make_reservation(self, guest: Guest, room_type: RoomType, check_in: date, check_out: date):
         return self.reservation_manager.make_reservation(guest, room_type, check_in, check_out)
@@ -245,4 +937,745 @@ class HotelSystem:
         return self.checkin_manager.check_in(reservation_id)
     
     def check_out_guest(self, reservation_id: str):
-        return self.checkin_manager.check_out(reservation_id)
\ No newline at end of file
+        return self.checkin_manager.check_out(reservation_id)
+    
+    def availability_matrix(self, start: date, end: date, room_types: Optional[List[RoomType]] = None):
+        return self.reservation_manager.availability_matrix(start, end, room_types)
+    
+    def iter_availability(self, start: date, end: date, room_types: Optional[List[RoomType]] = None,
+                          chunk_days: int = 31):
+        return self.reservation_manager.iter_availability(start, end, room_types, chunk_days)
+
+
+class AsyncHotelSystem:
+    """asyncio facade over HotelSystem that books in micro-batches.
+
+    make_reservation calls are queued and a single worker drains the queue into
+    batches of up to `max_batch_size`, waiting at most `max_wait` seconds after
+    the first request. Within a batch, each room type is served strictly in
+    arrival order, and each (room type, check-in, check-out) window is searched
+    once. Its requests then claim rooms from that shared result, re-checking each
+    room and falling back to a fresh search if another window took it.
+
+    Check-in and check-out are O(1) index updates, so they run inline.
+    """
+    def __init__(self, hotel: Optional[HotelSystem] = None, max_batch_size: int = 256, max_wait: float = 0.002):
+        self.hotel = hotel if hotel is not None else HotelSystem()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # The loop the queue and worker belong to
+    
+    async def make_reservation(self, guest: Guest, room_type: RoomType,
+                               check_in: date, check_out: date) -> Optional[Reservation]:
+        self.hotel.reservation_manager.validate_dates(check_in, check_out)
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            # First call, or the worker died with its loop (e.g. a second asyncio.run): start afresh here
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((guest, room_type, check_in, check_out, future))
+        return await future
+    
+    async def check_in_guest(self, reservation_id: str) -> bool:
+        return self.hotel.check_in_guest(reservation_id)
+    
+    async def check_out_guest(self, reservation_id: str) -> bool:
+        return self.hotel.check_out_guest(reservation_id)
+    
+    async def close(self):
+        """Finish every queued request and stop the worker"""
+        if self._worker is not None and not self._worker.done() and self._loop is asyncio.get_running_loop():
+            self._queue.put_nowait(None)
+            await self._worker
+        self._worker = self._queue = self._loop = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        running = True
+        while running:
+            request = await self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    request = self._queue.get_nowait()
+                if request is None:
+                    running = False
+                    break
+                batch.append(request)
+            self._commit(batch)
+    
+    def _commit(self, batch):
+        manager = self.hotel.reservation_manager
+        by_type: Dict[RoomType, list] = {}  # Preserves first-arrival order of room types
+        window_sizes: Dict[tuple, int] = {}
+        for request in batch:
+            guest, room_type, check_in, check_out, future = request
+            by_type.setdefault(room_type, []).append(request)
+            window = (room_type, check_in, check_out)
+            window_sizes[window] = window_sizes.get(window, 0) + 1
+        
+        candidates: Dict[tuple, List[Room]] = {}
+        searched_all: Dict[tuple, bool] = {}  # True when the search listed every free room
+        for requests in by_type.values():
+            for guest, room_type, check_in, check_out, future in requests:
+                if future.done():  # Caller gave up waiting
+                    continue
+                window = (room_type, check_in, check_out)
+                try:
+                    if window not in candidates:
+                        # One search serves every request for this window
+                        rooms = manager.find_available_rooms(room_type, check_in, check_out, window_sizes[window])
+                        searched_all[window] = len(rooms) < window_sizes[window]
+                        rooms.reverse()
+                        candidates[window] = rooms
+                    reservation = None
+                    rooms = candidates[window]
+                    while rooms and reservation is None:
+                        reservation = manager.reserve_room(guest, rooms.pop(), check_in, check_out)
+                    if reservation is None and not searched_all[window]:
+                        # Candidates went to overlapping windows; there may be rooms beyond the limit
+                        reservation = manager.make_reservation(guest, room_type, check_in, check_out)
+                    future.set_result(reservation)
+                except Exception as error:
+                    future.set_exception(error)
+
+# Persistence: write-ahead log + snapshots
+ROOM_TYPES = list(RoomType)
+ROOM_STATUSES = list(RoomStatus)
+RESERVATION_STATUSES = list(ReservationStatus)
+
+class ReservationJournal(HotelObserver):
+    """Append-only event log plus periodic binary snapshots for a ReservationManager.
+
+    Layout in `directory`:
+      snapshot.bin     - full state as of generation g (absent until the first snapshot)
+      wal-<g>.log      - events recorded after that snapshot
+
+    Each log record is `crc32 | payload length | event type | payload`. Records
+    are buffered and written with one fsync per `group_commit_size` events, or
+    at most `max_delay` seconds after the first buffered event (and on
+    sync()/close()). A snapshot is written to a temp file and renamed into
+    place, then the log rolls to the next generation. Recovery memory-maps the
+    snapshot and replays only the current log. Replay is idempotent, so an
+    event that landed in both the snapshot and the new log is applied once.
+    """
+    MAGIC = b"HOTELSNP"
+    VERSION = 1
+    
+    RECORD_HEADER = struct.Struct("<IIB")  # crc32, payload length, event type
+    ROOM = struct.Struct("<iiBdB")  # room number, floor, type, price per night, status
+    ROOM_STATUS = struct.Struct("<iB")
+    RESERVATION = struct.Struct("<16siqiidB")  # uuid, room, guest, check-in, check-out, price, status
+    RESERVATION_STATUS = struct.Struct("<16sB")
+    SNAPSHOT_HEADER = struct.Struct("<8sIQIII")  # magic, version, generation, rooms, guests, reservations
+    
+    ROOM_ADDED, ROOM_STATUS_CHANGED, RESERVATION_CREATED, RESERVATION_STATUS_CHANGED = range(4)
+    
+    def __init__(self, directory: str, group_commit_size: int = 256, snapshot_every: Optional[int] = None,
+                 max_delay: Optional[float] = 0.05):
+        self.directory = directory
+        self.group_commit_size = group_commit_size
+        self.max_delay = max_delay  # None leaves a partial group buffered until the next sync()
+        self.flush_timer: Optional[threading.Timer] = None
+        self.snapshot_every = snapshot_every
+        self.manager: Optional[ReservationManager] = None
+        self.generation = 0
+        self.log_file = None
+        self.buffer = bytearray()
+        self.pending = 0  # Events buffered since the last fsync
+        self.events_since_snapshot = 0
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+    
+    # Recovery
+    def recover(self, manager: ReservationManager) -> ReservationManager:
+        """Load the latest snapshot and log tail into an empty manager, then start journaling it"""
+        snapshot_path = os.path.join(self.directory, "snapshot.bin")
+        if os.path.exists(snapshot_path):
+            self.generation = self._load_snapshot(manager, snapshot_path)
+        self._replay_log(manager, self._log_path(self.generation))
+        self._watch(manager)  # Its state is already on disk
+        return manager
+    
+    def attach(self, manager: ReservationManager):
+        """Journal the manager: what it already holds as a snapshot, then every later change"""
+        self._watch(manager)
+        if manager.rooms or manager.reservations:  # Otherwise the log alone couldn't rebuild them
+            self.snapshot()
+    
+    def _watch(self, manager: ReservationManager):
+        self.manager = manager
+        self.log_file = open(self._log_path(self.generation), "ab")
+        manager.add_observer(self)
+        for room in manager.rooms:
+            room.add_observer(self)
+    
+    def _unwatch(self):
+        self.manager.remove_observer(self)
+        for room in self.manager.rooms:
+            room.remove_observer(self)
+    
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"wal-{generation:08d}.log")
+    
+    def _load_snapshot(self, manager: ReservationManager, path: str) -> int:
+        with open(path, "rb") as snapshot_file:
+            with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version, generation, room_count, guest_count, reservation_count = \
+                    self.SNAPSHOT_HEADER.unpack_from(data, 0)
+                if magic != self.MAGIC or version != self.VERSION:
+                    raise ValueError(f"{path} is not a version {self.VERSION} hotel snapshot")
+                offset = self.SNAPSHOT_HEADER.size
+                
+                rooms: Dict[int, Room] = {}
+                for _ in range(room_count):
+                    room = self._unpack_room(data, offset)
+                    offset += self.ROOM.size
+                    rooms[room.get_room_number()] = room
+                    manager.add_room(room)
+                
+                guests: Dict[int, Guest] = {}
+                for _ in range(guest_count):
+                    (guest_id,) = struct.unpack_from("<q", data, offset)
+                    fields, offset = self._unpack_strings(data, offset + 8, 3)
+                    guests[guest_id] = Guest(guest_id, *fields)
+                
+                for _ in range(reservation_count):
+                    id_bytes, room_number, guest_id, check_in, check_out, price, status = \
+                        self.RESERVATION.unpack_from(data, offset)
+                    offset += self.RESERVATION.size
+                    reservation = Reservation(str(uuid.UUID(bytes=id_bytes)), guests[guest_id], rooms[room_number],
+                                              date.fromordinal(check_in), date.fromordinal(check_out), price)
+                    reservation.status = RESERVATION_STATUSES[status]
+                    manager._store_reservation(reservation)
+        return generation
+    
+    def _replay_log(self, manager: ReservationManager, path: str):
+        if not os.path.exists(path):
+            return
+        rooms = {room.get_room_number(): room for room in manager.rooms}
+        guests: Dict[int, Guest] = {}
+        with open(path, "rb") as log_file:
+            data = log_file.read()
+        offset = 0
+        while offset + self.RECORD_HEADER.size <= len(data):
+            checksum, length, event = self.RECORD_HEADER.unpack_from(data, offset)
+            start = offset + self.RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break  # Torn write at the tail: everything after it was never acknowledged
+            self._apply(manager, rooms, guests, event, payload)
+            offset = start + length
+        if offset < len(data):
+            with open(path, "r+b") as log_file:
+                log_file.truncate(offset)
+    
+    def _apply(self, manager: ReservationManager, rooms: Dict[int, Room], guests: Dict[int, Guest],
+               event: int, payload: bytes):
+        if event == self.ROOM_ADDED:
+            room = self._unpack_room(payload, 0)
+            if room.get_room_number() not in rooms:
+                rooms[room.get_room_number()] = room
+                manager.add_room(room)
+        elif event == self.ROOM_STATUS_CHANGED:
+            room_number, status = self.ROOM_STATUS.unpack_from(payload, 0)
+            rooms[room_number]._set_status(ROOM_STATUSES[status])  # Keeps other observers in sync
+        elif event == self.RESERVATION_CREATED:
+            id_bytes, room_number, guest_id, check_in, check_out, price, status = \
+                self.RESERVATION.unpack_from(payload, 0)
+            reservation_id = str(uuid.UUID(bytes=id_bytes))
+            if manager.find_reservation_by_id(reservation_id):
+                return
+            if guest_id not in guests:
+                fields, _ = self._unpack_strings(payload, self.RESERVATION.size, 3)
+                guests[guest_id] = Guest(guest_id, *fields)
+            reservation = Reservation(reservation_id, guests[guest_id], rooms[room_number],
+                                      date.fromordinal(check_in), date.fromordinal(check_out), price)
+            reservation.status = RESERVATION_STATUSES[status]
+            manager._store_reservation(reservation)
+        elif event == self.RESERVATION_STATUS_CHANGED:
+            id_bytes, status = self.RESERVATION_STATUS.unpack_from(payload, 0)
+            reservation = manager.find_reservation_by_id(str(uuid.UUID(bytes=id_bytes)))
+            if reservation and reservation.get_status() != RESERVATION_STATUSES[status]:
+                manager.update_reservation_status(reservation, RESERVATION_STATUSES[status])
+    
+    # Logging
+    def room_added(self, room: Room):
+        room.add_observer(self)
+        self._append(self.ROOM_ADDED, self._pack_room(room))
+    
+    def room_status_changed(self, room: Room, old_status: RoomStatus):
+        self._append(self.ROOM_STATUS_CHANGED,
+                     self.ROOM_STATUS.pack(room.get_room_number(), ROOM_STATUSES.index(room.get_status())))
+    
+    def reservation_created(self, reservation: Reservation):
+        guest = reservation.get_guest()
+        self._append(self.RESERVATION_CREATED, self._pack_reservation(reservation) +
+                     self._pack_strings(guest.get_name(), guest.get_email(), guest.get_phone()))
+    
+    def reservation_status_changed(self, reservation: Reservation, old_status: ReservationStatus):
+        self._append(self.RESERVATION_STATUS_CHANGED, self.RESERVATION_STATUS.pack(
+            uuid.UUID(reservation.get_reservation_id()).bytes, RESERVATION_STATUSES.index(reservation.get_status())))
+    
+    def _append(self, event: int, payload: bytes):
+        with self.lock:
+            if not self.buffer and self.max_delay is not None and self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.max_delay, self._flush_due)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+            self.buffer += self.RECORD_HEADER.pack(zlib.crc32(payload), len(payload), event)
+            self.buffer += payload
+            self.pending += 1
+            self.events_since_snapshot += 1
+            if self.pending >= self.group_commit_size:
+                self.sync()
+            if self.snapshot_every and self.events_since_snapshot >= self.snapshot_every:
+                self.snapshot()
+    
+    def sync(self):
+        """Write buffered events and fsync them as one group commit"""
+        with self.lock:
+            if self.buffer:
+                self.log_file.write(self.buffer)
+                self.log_file.flush()
+                os.fsync(self.log_file.fileno())
+                self.buffer.clear()
+            self.pending = 0
+    
+    def _flush_due(self):
+        with self.lock:
+            self.flush_timer = None
+            if self.log_file is not None:
+                self.sync()
+    
+    def close(self):
+        """Flush the log and stop journaling the manager"""
+        with self.lock:
+            if self.log_file is not None:
+                if self.flush_timer is not None:
+                    self.flush_timer.cancel()
+                    self.flush_timer = None
+                self._unwatch()
+                self.sync()
+                self.log_file.close()
+                self.log_file = None
+    
+    # Snapshots
+    def snapshot(self):
+        """Write the attached manager's full state and roll the log to a new generation"""
+        with self.lock:
+            self.sync()
+            rooms = list(self.manager.rooms)  # One consistent view: add_room may run concurrently
+            reservations = list(self.manager.reservations)
+            next_generation = self.generation + 1
+            guests: Dict[int, Guest] = {}
+            for reservation in reservations:
+                guests.setdefault(reservation.get_guest().get_guest_id(), reservation.get_guest())
+            
+            temp_path = os.path.join(self.directory, "snapshot.tmp")
+            with open(temp_path, "wb") as snapshot_file:
+                snapshot_file.write(self.SNAPSHOT_HEADER.pack(self.MAGIC, self.VERSION, next_generation,
+                                                              len(rooms), len(guests), len(reservations)))
+                snapshot_file.write(b"".join(self._pack_room(room) for room in rooms))
+                snapshot_file.write(b"".join(struct.pack("<q", guest_id) +
+                                             self._pack_strings(guest.get_name(), guest.get_email(), guest.get_phone())
+                                             for guest_id, guest in guests.items()))
+                snapshot_file.write(b"".join(self._pack_reservation(reservation)
+                                             for reservation in reservations))
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temp_path, os.path.join(self.directory, "snapshot.bin"))
+            
+            old_log = self._log_path(self.generation)
+            self.log_file.close()
+            self.generation = next_generation
+            self.log_file = open(self._log_path(self.generation), "ab")
+            os.remove(old_log)
+            self.events_since_snapshot = 0
+    
+    # Encoding
+    def _pack_room(self, room: Room) -> bytes:
+        return self.ROOM.pack(room.get_room_number(), room.get_floor(), ROOM_TYPES.index(room.get_room_type()),
+                              room.get_price_per_night(), ROOM_STATUSES.index(room.get_status()))
+    
+    def _unpack_room(self, data, offset: int) -> Room:
+        room_number, floor, room_type, price, status = self.ROOM.unpack_from(data, offset)
+        room = Room(room_number, floor, ROOM_TYPES[room_type], price)
+        room.status = ROOM_STATUSES[status]
+        return room
+    
+    def _pack_reservation(self, reservation: Reservation) -> bytes:
+        return self.RESERVATION.pack(
+            uuid.UUID(reservation.get_reservation_id()).bytes, reservation.get_room().get_room_number(),
+            reservation.get_guest().get_guest_id(), reservation.get_check_in_date().toordinal(),
+            reservation.get_check_out_date().toordinal(), reservation.total_price,
+            RESERVATION_STATUSES.index(reservation.get_status()))
+    
+    def _pack_strings(self, *values: str) -> bytes:
+        parts = []
+        for value in values:
+            encoded = value.encode("utf-8")
+            parts.append(struct.pack("<H", len(encoded)) + encoded)
+        return b"".join(parts)
+    
+    def _unpack_strings(self, data, offset: int, count: int) -> Tuple[List[str], int]:
+        values = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("<H", data, offset)
+            offset += 2
+            values.append(bytes(data[offset:offset + length]).decode("utf-8"))
+            offset += length
+        return values, offset
+
+# Benchmarks (run with: python Hotel-managment-system.py --bench)
+def benchmark_reservation_lookups(sizes=(10_000, 100_000, 1_000_000), lookups: int = 200):
+    """Compare the indexed id/guest lookups against a linear scan of the history"""
+    import random
+    import time
+
+    room = Room(101, 1, RoomType.STANDARD, 100.0)
+    start = date.today()
+    for size in sizes:
+        manager = ReservationManager()
+        guests = [Guest(guest_id, f"Guest {guest_id}", "", "") for guest_id in range(max(1, size // 10))]
+        for i in range(size):
+            check_in = start + timedelta(days=i)
+            reservation = Reservation(str(uuid.uuid4()), guests[i % len(guests)], room,
+                                      check_in, check_in + timedelta(days=1), 100.0)
+            reservation.status = ReservationStatus.COMPLETED
+            manager._store_reservation(reservation)
+
+        sample = random.Random(size).sample(manager.reservations, lookups)
+
+        began = time.perf_counter()
+        for reservation in sample:
+            manager.find_reservation_by_id(reservation.get_reservation_id())
+            manager.find_reservations_by_guest(reservation.get_guest().get_guest_id())
+        indexed = (time.perf_counter() - began) / lookups
+
+        began = time.perf_counter()
+        for reservation in sample[:max(1, lookups // 20)]:
+            reservation_id = reservation.get_reservation_id()
+            guest_id = reservation.get_guest().get_guest_id()
+            next(r for r in manager.reservations if r.get_reservation_id() == reservation_id)
+            [r for r in manager.reservations if r.get_guest().get_guest_id() == guest_id]
+        scanned = (time.perf_counter() - began) / max(1, lookups // 20)
+
+        print(f"{size:>9,} reservations: indexed {indexed * 1e6:8.2f} us/lookup, "
+              f"scan {scanned * 1e6:12.2f} us/lookup ({scanned / indexed:,.0f}x)")
+
+
+def check_engines_agree(operations: int = 20_000, room_count: int = 60, seed: int = 7,
+                        probe_every: int = 50):
+    """Drive the scan engine and the bitmap engine with the same random workload.
+
+    Every `probe_every` steps the per-room index is also checked against a
+    linear scan of the reservations for random rooms and windows.
+    """
+    import random
+
+    rng = random.Random(seed)
+    scan_hotel, bitmap_hotel = HotelSystem(), HotelSystem(use_occupancy_bitmap=True)
+    for number in range(room_count):
+        for hotel in (scan_hotel, bitmap_hotel):
+            hotel.add_room(Room(100 + number, number // 20, list(RoomType)[number % len(RoomType)], 100.0))
+
+    first_night = date.today() + timedelta(days=1)
+    booked_ids = []
+    for step in range(operations):
+        if step % probe_every == 0:
+            for hotel in (scan_hotel, bitmap_hotel):
+                manager = hotel.reservation_manager
+                for _ in range(5):
+                    room = rng.choice(manager.rooms)
+                    check_in = first_night + timedelta(days=rng.randrange(-5, 190))
+                    check_out = check_in + timedelta(days=rng.randint(1, 14))
+                    assert (manager._is_room_available(room, check_in, check_out) ==
+                            manager._is_room_available_scan(room, check_in, check_out)), \
+                        f"step {step}: room index disagrees with a scan for room {room.get_room_number()}"
+        roll = rng.random()
+        if roll < 0.6 or not booked_ids:
+            guest = Guest(step, f"Guest {step}", "", "")
+            room_type = rng.choice(list(RoomType))
+            check_in = first_night + timedelta(days=rng.randrange(180))
+            check_out = check_in + timedelta(days=rng.randint(1, 10))
+            expected = scan_hotel.make_reservation(guest, room_type, check_in, check_out)
+            actual = bitmap_hotel.make_reservation(guest, room_type, check_in, check_out)
+            assert (expected is None) == (actual is None), f"step {step}: engines disagree on availability"
+            if expected is None:
+                continue
+            assert expected.get_room().get_room_number() == actual.get_room().get_room_number()
+            booked_ids.append((expected.get_reservation_id(), actual.get_reservation_id()))
+        else:
+            ids = rng.choice(booked_ids)
+            pairs = list(zip((scan_hotel, bitmap_hotel), ids))
+            if roll < 0.8:
+                results = [h.reservation_manager.cancel_reservation(rid) for h, rid in pairs]
+            elif roll < 0.9:
+                results = [h.check_in_guest(rid) for h, rid in pairs]
+            else:
+                results = [h.check_out_guest(rid) for h, rid in pairs]
+            assert results[0] == results[1], f"step {step}: engines disagree on a status change"
+    print(f"Engines agreed on {operations:,} random operations "
+          f"({len(scan_hotel.reservation_manager.reservations):,} reservations)")
+
+
+def stress_test_concurrent_booking(bookings: int = 20_000, workers: int = 32, room_count: int = 200,
+                                   use_occupancy_bitmap: bool = False):
+    """Book from a thread pool and assert no room ends up with overlapping active reservations"""
+    import random
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    hotel = HotelSystem(use_occupancy_bitmap=use_occupancy_bitmap, concurrent=True)
+    for number in range(room_count):
+        hotel.add_room(Room(100 + number, number // 20, list(RoomType)[number % len(RoomType)], 100.0))
+    first_night = date.today() + timedelta(days=1)
+
+    def book(request_number: int):
+        rng = random.Random(request_number)
+        check_in = first_night + timedelta(days=rng.randrange(60))
+        reservation = hotel.make_reservation(Guest(request_number, f"Guest {request_number}", "", ""),
+                                             rng.choice(list(RoomType)), check_in,
+                                             check_in + timedelta(days=rng.randint(1, 5)))
+        if reservation and rng.random() < 0.1:
+            hotel.reservation_manager.cancel_reservation(reservation.get_reservation_id())
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(book, range(bookings)))
+    elapsed = time.perf_counter() - began
+
+    by_room: Dict[int, List[Reservation]] = {}
+    for reservation in hotel.reservation_manager.reservations:
+        if reservation.get_status() in ACTIVE_RESERVATION_STATUSES:
+            by_room.setdefault(reservation.get_room().get_room_number(), []).append(reservation)
+    confirmed = 0
+    for room_number, reservations in by_room.items():
+        reservations.sort(key=lambda r: r.get_check_in_date())
+        for earlier, later in zip(reservations, reservations[1:]):
+            assert earlier.get_check_out_date() <= later.get_check_in_date(), f"room {room_number} double-booked"
+        assert len(hotel.reservation_manager.room_index[room_number]) == len(reservations)
+        confirmed += len(reservations)
+    print(f"{bookings:,} concurrent requests on {workers} threads: {bookings / elapsed:,.0f} requests/s, "
+          f"{confirmed:,} active reservations, no double bookings")
+
+
+def benchmark_async_batching(requests: int = 20_000, room_count: int = 500):
+    """Compare AsyncHotelSystem batching against one executor call per request"""
+    import random
+    import time
+
+    def build_hotel():
+        hotel = HotelSystem()
+        for number in range(room_count):
+            hotel.add_room(Room(100 + number, number // 20, list(RoomType)[number % len(RoomType)], 100.0))
+        return hotel
+
+    rng = random.Random(11)
+    first_night = date.today() + timedelta(days=1)
+    workload = []
+    for request_number in range(requests):
+        check_in = first_night + timedelta(days=rng.randrange(30))
+        workload.append((Guest(request_number, f"Guest {request_number}", "", ""), rng.choice(list(RoomType)),
+                         check_in, check_in + timedelta(days=rng.randint(1, 3))))
+
+    async def per_call_executor():
+        hotel = build_hotel()
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(None, hotel.make_reservation, *args)
+                                      for args in workload))
+
+    async def batched():
+        async with AsyncHotelSystem(build_hotel()) as hotel:
+            return await asyncio.gather(*(hotel.make_reservation(*args) for args in workload))
+
+    for label, run in (("executor per call", per_call_executor), ("AsyncHotelSystem", batched)):
+        began = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - began
+        booked = sum(1 for reservation in results if reservation is not None)
+        print(f"{label:>18}: {requests / elapsed:,.0f} requests/s ({booked:,} booked)")
+
+
+def benchmark_reservation_memory(count: int = 200_000):
+    """Per-reservation footprint: dict-backed objects vs __slots__ objects vs ReservationStore"""
+    import tracemalloc
+
+    class DictReservation(Reservation):
+        pass  # No __slots__, so instances get a __dict__ like the original class
+
+    room = Room(101, 1, RoomType.STANDARD, 100.0)
+    guests = [Guest(guest_id, f"Guest {guest_id}", "", "") for guest_id in range(1000)]
+    start = date.today()
+
+    def build(reservation_class):
+        built = []
+        for i in range(count):
+            check_in = start + timedelta(days=i % 365)
+            built.append(reservation_class(str(uuid.uuid4()), guests[i % len(guests)], room,
+                                           check_in, check_in + timedelta(days=2), 200.0))
+        return built
+
+    for label, make in (("dict-backed objects", lambda: build(DictReservation)),
+                        ("slotted objects", lambda: build(Reservation)),
+                        ("ReservationStore", lambda: ReservationStore.from_reservations(build(Reservation)))):
+        tracemalloc.start()
+        kept = make()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:>20}: {current / count:7.1f} bytes/reservation ({len(kept):,} kept)")
+        del kept
+
+
+def benchmark_recovery(reservation_count: int = 1_000_000, tail_events: int = 10_000, room_count: int = 5_000):
+    """Time recovery from a snapshot of `reservation_count` reservations plus a short log tail"""
+    import random
+    import shutil
+    import tempfile
+    import time
+
+    directory = tempfile.mkdtemp(prefix="hotel-journal-")
+    try:
+        manager = ReservationManager()
+        for number in range(room_count):
+            manager.add_room(Room(number, number // 100, ROOM_TYPES[number % len(ROOM_TYPES)], 100.0))
+        guests = [Guest(guest_id, f"Guest {guest_id}", f"guest{guest_id}@example.com", "5550000000")
+                  for guest_id in range(reservation_count // 4 + 1)]
+        first_night = date.today() - timedelta(days=365)
+        for i in range(reservation_count):
+            # Each room gets back-to-back two-night stays
+            check_in = first_night + timedelta(days=2 * (i // room_count))
+            reservation = Reservation(str(uuid.uuid4()), guests[i % len(guests)], manager.rooms[i % room_count],
+                                      check_in, check_in + timedelta(days=2), 200.0)
+            reservation.status = ReservationStatus.COMPLETED
+            manager._store_reservation(reservation)
+
+        journal = ReservationJournal(directory, group_commit_size=1024)
+        began = time.perf_counter()
+        journal.attach(manager)  # Snapshots what the manager already holds
+        print(f"snapshot of {reservation_count:,} reservations written in {time.perf_counter() - began:.2f}s")
+
+        rng = random.Random(5)
+        for i in range(tail_events):
+            if rng.random() < 0.5:
+                manager.rooms[rng.randrange(room_count)].mark_cleaning()
+            else:
+                reservation = manager.reservations[rng.randrange(len(manager.reservations))]
+                manager.update_reservation_status(reservation, ReservationStatus.CANCELLED)
+        journal.close()
+
+        began = time.perf_counter()
+        recovered = ReservationJournal(directory).recover(ReservationManager())
+        elapsed = time.perf_counter() - began
+        assert len(recovered.reservations) == reservation_count
+        print(f"recovered {len(recovered.reservations):,} reservations + {tail_events:,} log events "
+              f"in {elapsed:.2f}s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def naive_revenue_metrics(manager: ReservationManager, start: date, end: date,
+                          room_type: Optional[RoomType] = None) -> Dict[str, float]:
+    """Reference implementation: expand every reservation night by night"""
+    revenue, sold = 0.0, 0
+    for reservation in manager.reservations:
+        if reservation.get_status() not in RevenueAnalytics.SOLD_STATUSES:
+            continue
+        if room_type is not None and reservation.get_room().get_room_type() != room_type:
+            continue
+        nights = (reservation.get_check_out_date() - reservation.get_check_in_date()).days
+        night = reservation.get_check_in_date()
+        for _ in range(nights):
+            if start <= night < end:
+                revenue += reservation.total_price / nights
+                sold += 1
+            night += timedelta(days=1)
+    rooms = sum(1 for room in manager.rooms if room_type is None or room.get_room_type() == room_type)
+    available = rooms * (end - start).days
+    return {'revenue': revenue, 'room_nights_sold': sold, 'room_nights_available': available,
+            'occupancy': sold / available if available else 0.0, 'adr': revenue / sold if sold else 0.0,
+            'revpar': revenue / available if available else 0.0}
+
+
+def benchmark_revenue_analytics(room_count: int = 5_000, days: int = 365, queries: int = 100):
+    """Range queries on RevenueAnalytics vs the naive night-by-night expansion"""
+    import random
+    import time
+
+    rng = random.Random(3)
+    manager = ReservationManager()
+    for number in range(room_count):
+        manager.add_room(Room(number, number // 100, ROOM_TYPES[number % len(ROOM_TYPES)], 80.0 + 40 * (number % 4)))
+    horizon_start = date.today() - timedelta(days=days)
+    guest = Guest(1, "Guest", "", "")
+    for room in manager.rooms:
+        night = horizon_start
+        while night < date.today():
+            stay = rng.randint(1, 4)
+            if rng.random() < 0.7:
+                reservation = Reservation(str(uuid.uuid4()), guest, room, night, night + timedelta(days=stay),
+                                          stay * room.get_price_per_night())
+                reservation.status = ReservationStatus.COMPLETED
+                manager._store_reservation(reservation)
+            night += timedelta(days=stay)
+
+    began = time.perf_counter()
+    analytics = RevenueAnalytics(manager, horizon_start, date.today())
+    print(f"built analytics over {len(manager.reservations):,} reservations in {time.perf_counter() - began:.2f}s")
+
+    windows = []
+    for _ in range(queries):
+        first = rng.randrange(days - 1)
+        windows.append((horizon_start + timedelta(days=first),
+                        horizon_start + timedelta(days=rng.randint(first + 1, days)), rng.choice(ROOM_TYPES)))
+    began = time.perf_counter()
+    for start, end, room_type in windows:
+        analytics.metrics(start, end, room_type=room_type)
+        analytics.by_floor(start, end)
+    fast = (time.perf_counter() - began) / queries
+    print(f"RevenueAnalytics: {fast * 1e3:.3f} ms per type + all-floors query")
+
+    start, end, room_type = windows[0]
+    began = time.perf_counter()
+    expected = naive_revenue_metrics(manager, start, end, room_type)
+    slow = time.perf_counter() - began
+    actual = analytics.metrics(start, end, room_type=room_type)
+    assert abs(expected['revenue'] - actual['revenue']) < 1e-6 * max(1.0, expected['revenue'])
+    assert expected['room_nights_sold'] == actual['room_nights_sold']
+    print(f"naive baseline: {slow * 1e3:.1f} ms per single-type query ({slow / fast:,.0f}x slower)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        benchmark_reservation_lookups()
+        check_engines_agree()
+        stress_test_concurrent_booking()
+        stress_test_concurrent_booking(use_occupancy_bitmap=True)
+        benchmark_async_batching()
+        benchmark_reservation_memory()
+        benchmark_recovery()
+        benchmark_revenue_analytics()
@@ -149,9 +149,27 @@ LibraryManager methods:
 
 """
 
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, OrderedDict, deque
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+import bisect
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import queue
+import re
+import sqlite3
+import threading
+import weakref
+import zlib
 
 class BorrowStatus(Enum):
     ACTIVE = "active"
@@ -160,19 +178,25 @@ class BorrowStatus(Enum):
 class ReserveStatus(Enum):
     ACTIVE = "active"
     FULFILLED = "fulfilled"
+    CANCELLED = "cancelled"
 
 # Entities
 class LibMember:
-    def __init__(self, name: str, member_id: str, age: int):
+    __slots__ = ('name', 'member_id', 'age', 'borrow_limit', 'current_borrows', '__weakref__')
+    
+    def __init__(self, name: str, member_id: str, age: int, borrow_limit: int = 5):
         self.name = name
         self.member_id = member_id
         self.age = age
-        self.current_borrows: List['Borrow'] = []
+        self.borrow_limit = borrow_limit  # Raised for institutional accounts
+        self.current_borrows: Dict[str, 'Borrow'] = {}  # borrow_id -> Borrow, oldest first
     
     def can_borrow(self) -> bool:
-        return len(self.current_borrows) < 5
+        return len(self.current_borrows) < self.borrow_limit
 
 class Book:
+    __slots__ = ('book_id', 'name', 'author', 'total_copies', 'available_copies', '__weakref__')
+    
     def __init__(self, book_id: str, name: str, author: str, total_copies: int):
         self.book_id = book_id
         self.name = name
@@ -184,6 +208,8 @@ class Book:
         return self.available_copies > 0
 
 class Borrow:
+    __slots__ = ('borrow_id', 'book', 'member', 'borrow_date', 'due_date', 'return_date', 'status', '__weakref__')
+    
     def __init__(self, borrow_id: str, book: Book, member: LibMember):
         self.borrow_id = borrow_id
         self.book = book
@@ -211,30 +237,1527 @@ class Admin:
         self.name = name
         self.employee_id = employee_id
 
+# Search
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BookSearchIndex:
+    """Inverted index from title/author terms to book ids.
+
+    Query terms are matched as prefixes against a sorted vocabulary and every
+    term must match (AND). Candidates come from the postings of the most
+    selective term; the remaining terms only filter and rank that small set,
+    ordered exact title word > title prefix > exact author word > author prefix.
+    """
+    TITLE_EXACT, TITLE_PREFIX, AUTHOR_EXACT, AUTHOR_PREFIX = 4, 3, 2, 1
+    
+    def __init__(self, books: Dict[str, 'Book']):
+        self.books = books  # book_id -> Book, used to rank candidates
+        self.title_postings: Dict[str, Set[str]] = {}  # term -> book_ids
+        self.author_postings: Dict[str, Set[str]] = {}
+        self.vocabulary: List[str] = []  # Sorted union of all terms, for prefix ranges
+        self.lock = threading.Lock()
+    
+    def add(self, book: 'Book'):
+        with self.lock:
+            for term in set(tokenize(book.name)):
+                self._post(self.title_postings, term, book.book_id)
+            for term in set(tokenize(book.author)):
+                self._post(self.author_postings, term, book.book_id)
+    
+    def add_many(self, books: Iterable['Book']):
+        """Batch form of add: the vocabulary is re-sorted once instead of insorting each new term"""
+        with self.lock:
+            new_terms = []
+            for book in books:
+                for postings, text in ((self.title_postings, book.name), (self.author_postings, book.author)):
+                    for term in set(tokenize(text)):
+                        book_ids = postings.get(term)
+                        if book_ids is not None:
+                            book_ids.add(book.book_id)
+                            continue
+                        if term not in self.title_postings and term not in self.author_postings:
+                            new_terms.append(term)
+                        postings[term] = {book.book_id}
+            self.vocabulary += new_terms
+            self.vocabulary.sort()
+    
+    def remove(self, book: 'Book'):
+        with self.lock:
+            for term in set(tokenize(book.name)):
+                self._unpost(self.title_postings, term, book.book_id)
+            for term in set(tokenize(book.author)):
+                self._unpost(self.author_postings, term, book.book_id)
+    
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Ranked book ids matching every query term"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self.lock:
+            return self._search(terms, limit)
+    
+    def _search(self, terms: Set[str], limit: Optional[int]) -> List[str]:
+        # Seed from the term with the fewest postings
+        seed, seed_words, smallest = None, None, None
+        for term in terms:
+            words = self._words_with_prefix(term)
+            size = self._postings_size(words, smallest)
+            if smallest is None or size < smallest:
+                seed, seed_words, smallest = term, words, size
+        scores = self._seed_scores(seed, seed_words)
+        
+        others = terms - {seed}
+        if others:
+            for book_id in list(scores):
+                book = self.books[book_id]
+                title_terms, author_terms = tokenize(book.name), tokenize(book.author)
+                for term in others:
+                    term_score = self._score(term, title_terms, author_terms)
+                    if not term_score:
+                        del scores[book_id]
+                        break
+                    scores[book_id] += term_score
+        rank = lambda book_id: (-scores[book_id], book_id)
+        if limit is not None:
+            return heapq.nsmallest(limit, scores, key=rank)
+        return sorted(scores, key=rank)
+    
+    def _words_with_prefix(self, term: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + "\U0010ffff")
+        return self.vocabulary[start:end]
+    
+    def _seed_scores(self, term: str, words: List[str]) -> Dict[str, int]:
+        """Scores for one term straight from the postings, weakest match first so stronger ones overwrite"""
+        title_matches, author_matches = set(), set()
+        for word in words:
+            title_matches.update(self.title_postings.get(word, ()))
+            author_matches.update(self.author_postings.get(word, ()))
+        scores = dict.fromkeys(author_matches, self.AUTHOR_PREFIX)
+        scores.update(dict.fromkeys(self.author_postings.get(term, ()), self.AUTHOR_EXACT))
+        scores.update(dict.fromkeys(title_matches, self.TITLE_PREFIX))
+        scores.update(dict.fromkeys(self.title_postings.get(term, ()), self.TITLE_EXACT))
+        return scores
+    
+    def _postings_size(self, words: List[str], cap: Optional[int]) -> int:
+        """Total postings behind `words`, giving up once it exceeds `cap`"""
+        size = 0
+        for word in words:
+            size += len(self.title_postings.get(word, ())) + len(self.author_postings.get(word, ()))
+            if cap is not None and size > cap:
+                break
+        return size
+    
+    def _score(self, term: str, title_terms: List[str], author_terms: List[str]) -> int:
+        if term in title_terms:
+            return self.TITLE_EXACT
+        if any(word.startswith(term) for word in title_terms):
+            return self.TITLE_PREFIX
+        if term in author_terms:
+            return self.AUTHOR_EXACT
+        if any(word.startswith(term) for word in author_terms):
+            return self.AUTHOR_PREFIX
+        return 0
+    
+    def _post(self, postings: Dict[str, Set[str]], term: str, book_id: str):
+        if term not in self.title_postings and term not in self.author_postings:
+            bisect.insort(self.vocabulary, term)
+        postings.setdefault(term, set()).add(book_id)
+    
+    def _unpost(self, postings: Dict[str, Set[str]], term: str, book_id: str):
+        book_ids = postings.get(term)
+        if book_ids is None:
+            return
+        book_ids.discard(book_id)
+        if not book_ids:
+            del postings[term]
+            if term not in self.title_postings and term not in self.author_postings:
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+
+class AutocompleteIndex:
+    """Top-k title/author completions ranked by borrow popularity.
+
+    Completions live in one sorted array of lowercased texts, so a prefix is a
+    bisect range rather than a chain of per-character trie nodes. New texts go
+    to a small sorted buffer that is spliced into the array once it outgrows
+    8*sqrt(n). Prefixes whose range is too big to rank on the fly keep a cached
+    top list, built when the range first crosses SCAN_LIMIT and kept current by
+    offering every added or borrowed text to the lists along its prefix path.
+    """
+    SCAN_LIMIT = 256  # Ranges up to this size are ranked per query
+    
+    def __init__(self, cache_size: int = 10):
+        self.cache_size = cache_size  # Entries kept per cached top list
+        self.keys: List[str] = []  # Sorted lowercased titles and authors
+        self.pending: List[str] = []  # Sorted, not yet spliced into keys
+        self.display: Dict[str, str] = {}  # key -> text as first added
+        self.popularity: Dict[str, int] = {}  # key -> borrows of the books carrying it
+        self.book_counts: Dict[str, int] = {}  # key -> books carrying it
+        self.borrow_counts: Dict[str, int] = {}  # book_id -> borrows so far
+        self.top: Dict[str, List[str]] = {}  # heavy prefix -> keys, most popular first
+        self.lock = threading.Lock()
+    
+    def add(self, book: 'Book'):
+        with self.lock:
+            self._add(book)
+    
+    def remove(self, book: 'Book'):
+        with self.lock:
+            self._remove(book)
+    
+    def add_many(self, books: Iterable['Book']):
+        """Batch form of add that leaves the top lists to rebuild(); until then they fill in lazily"""
+        with self.lock:
+            for book in books:
+                borrows = self.borrow_counts.get(book.book_id, 0)
+                for key, text in self._keys(book).items():
+                    if key in self.book_counts:
+                        self.book_counts[key] += 1
+                        self.popularity[key] += borrows
+                    else:
+                        self.book_counts[key] = 1
+                        self.popularity[key] = borrows
+                        self.display[key] = text
+                        self.pending.append(key)
+            self.pending.sort()
+            self._flush()
+            self.top.clear()
+    
+    def rebuild(self):
+        """Recompute every heavy prefix's top list in one pass over the sorted keys"""
+        with self.lock:
+            self._flush()
+            self.top.clear()
+            self._build(0, len(self.keys), 0)
+    
+    def record_borrow(self, book: 'Book'):
+        with self.lock:
+            self.borrow_counts[book.book_id] = self.borrow_counts.get(book.book_id, 0) + 1
+            for key in self._keys(book):
+                self.popularity[key] += 1
+                self._promote(key)
+    
+    def complete(self, prefix: str, k: int = 10) -> List[str]:
+        """Up to k titles/authors starting with `prefix`, most borrowed first"""
+        prefix = prefix.lower()
+        with self.lock:
+            top = self.top.get(prefix)
+            if top is None and self._range_size(prefix) > self.SCAN_LIMIT:
+                top = self.top[prefix] = self._rank(prefix, self.cache_size)
+            if top is None or k > len(top):
+                top = self._rank(prefix, k)
+            return [self.display[key] for key in top[:k]]
+    
+    def _add(self, book: 'Book'):
+        borrows = self.borrow_counts.get(book.book_id, 0)
+        for key, text in self._keys(book).items():
+            if key in self.book_counts:
+                self.book_counts[key] += 1
+                self.popularity[key] += borrows
+            else:
+                self.book_counts[key] = 1
+                self.popularity[key] = borrows
+                self.display[key] = text
+                bisect.insort(self.pending, key)
+                if len(self.pending) > 8 * max(8, math.isqrt(len(self.keys))):
+                    self._flush()
+            self._promote(key)
+    
+    def _remove(self, book: 'Book'):
+        borrows = self.borrow_counts.get(book.book_id, 0)
+        for key in self._keys(book):
+            self.book_counts[key] -= 1
+            self.popularity[key] -= borrows
+            gone = not self.book_counts[key]
+            if gone:
+                del self.book_counts[key], self.popularity[key], self.display[key]
+                keys = self.pending if self._contains(self.pending, key) else self.keys
+                del keys[bisect.bisect_left(keys, key)]
+            if gone or borrows:
+                self._demote(key, gone)
+    
+    def _keys(self, book: 'Book') -> Dict[str, str]:
+        return {text.lower(): text for text in (book.name, book.author) if text}
+    
+    def _rank_key(self, key: str):
+        return -self.popularity[key], key
+    
+    def _ranges(self, prefix: str):
+        end = prefix + "\U0010ffff"
+        for keys in (self.keys, self.pending):
+            yield keys, bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, end)
+    
+    def _range_size(self, prefix: str) -> int:
+        return sum(hi - lo for _, lo, hi in self._ranges(prefix))
+    
+    def _rank(self, prefix: str, k: int) -> List[str]:
+        candidates = [key for keys, lo, hi in self._ranges(prefix) for key in keys[lo:hi]]
+        return heapq.nsmallest(k, candidates, key=self._rank_key)
+    
+    def _promote(self, key: str):
+        """Offer `key` to every heavy prefix on its path, building lists for prefixes that just became heavy"""
+        popularity = self.popularity[key]
+        for length in range(len(key) + 1):
+            prefix = key[:length]
+            top = self.top.get(prefix)
+            if top is None:
+                if self._range_size(prefix) <= self.SCAN_LIMIT:
+                    break  # Longer prefixes cover no more keys
+                self.top[prefix] = self._rank(prefix, self.cache_size)
+                continue
+            last = top[-1]
+            if popularity < self.popularity[last] or popularity == self.popularity[last] and key > last:
+                continue  # Neither listed nor good enough to be
+            elif key in top:
+                top.sort(key=self._rank_key)
+            else:
+                top[-1] = key
+                top.sort(key=self._rank_key)
+    
+    def _demote(self, key: str, gone: bool):
+        """Drop lists that may now be missing a better key; they are rebuilt when next needed"""
+        for length in range(len(key) + 1):
+            prefix = key[:length]
+            top = self.top.get(prefix)
+            if top is not None and (key in top or gone and self._range_size(prefix) <= self.SCAN_LIMIT):
+                del self.top[prefix]
+    
+    def _build(self, lo: int, hi: int, depth: int) -> List[str]:
+        """Top list for keys[lo:hi], which share their first `depth` characters, merged up from its children"""
+        if hi - lo <= self.SCAN_LIMIT:
+            return heapq.nsmallest(self.cache_size, self.keys[lo:hi], key=self._rank_key)
+        candidates, i = [], lo
+        while i < hi:
+            key = self.keys[i]
+            if len(key) == depth:  # The prefix itself; sorts before its extensions
+                candidates.append(key)
+                i += 1
+                continue
+            end = bisect.bisect_left(self.keys, key[:depth + 1] + "\U0010ffff", i, hi)
+            candidates += self._build(i, end, depth + 1)
+            i = end
+        top = self.top[self.keys[lo][:depth]] = heapq.nsmallest(self.cache_size, candidates, key=self._rank_key)
+        return top
+    
+    def _flush(self):
+        merged, start = [], 0
+        for key in self.pending:
+            end = bisect.bisect_left(self.keys, key, start)
+            merged += self.keys[start:end]
+            merged.append(key)
+            start = end
+        merged += self.keys[start:]
+        self.keys, self.pending = merged, []
+    
+    @staticmethod
+    def _contains(keys: List[str], key: str) -> bool:
+        i = bisect.bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+# Due dates
+class DueDateIndex:
+    """Active borrows ordered by (due_date, borrow_id).
+
+    Borrows are always due 14 days out, so new entries land at the end of the
+    sorted list and insertion is a bisect plus an append. Returns only drop the
+    borrow from `active`; the stale entry is pruned the next time a range query
+    walks over it, or by a full compaction once half the list is stale, so a
+    query pays for its k results plus stale entries it removes for good.
+    """
+    
+    def __init__(self):
+        self.entries: List[Tuple[datetime, str]] = []  # Sorted, may hold returned borrows
+        self.active: Dict[str, 'Borrow'] = {}  # borrow_id -> Borrow still out
+        self.stale = 0  # Entries whose borrow has been returned
+        self.lock = threading.Lock()
+    
+    def add(self, borrow: 'Borrow'):
+        with self.lock:
+            bisect.insort(self.entries, (borrow.due_date, borrow.borrow_id))
+            self.active[borrow.borrow_id] = borrow
+    
+    def remove(self, borrow: 'Borrow'):
+        with self.lock:
+            if self.active.pop(borrow.borrow_id, None) is None:
+                return
+            self.stale += 1
+            if self.stale > len(self.entries) // 2:
+                self.entries = [entry for entry in self.entries if entry[1] in self.active]
+                self.stale = 0
+    
+    def due_between(self, start: Optional[datetime], end: datetime) -> List['Borrow']:
+        """Active borrows due in [start, end), soonest first"""
+        with self.lock:
+            lo = 0 if start is None else bisect.bisect_left(self.entries, (start,))
+            hi = bisect.bisect_left(self.entries, (end,))
+            live = [entry for entry in self.entries[lo:hi] if entry[1] in self.active]
+            if len(live) < hi - lo:  # Prune what we walked over
+                self.stale -= hi - lo - len(live)
+                self.entries[lo:hi] = live
+            return [self.active[borrow_id] for _, borrow_id in live]
+    
+    def iter_due(self, end: datetime, after: Optional[Tuple[datetime, str]] = None) -> Iterator['Borrow']:
+        """Stream active borrows due before `end`, resuming past the (due_date, borrow_id) cursor `after`"""
+        cursor = after
+        while True:
+            # Re-find our place each step so borrows and pruning between pages are harmless
+            with self.lock:
+                i = 0 if cursor is None else bisect.bisect_right(self.entries, cursor)
+                borrow = None
+                while i < len(self.entries) and self.entries[i][0] < end:
+                    cursor = self.entries[i]
+                    borrow = self.active.get(cursor[1])
+                    if borrow is not None:
+                        break
+                    i += 1
+            if borrow is None:
+                return
+            yield borrow
+
+# Notifications
+class Notification(NamedTuple):
+    send_at: datetime
+    kind: str  # "due_soon", "overdue", "reservation_placed" or "reservation_fulfilled"
+    member_id: str
+    ref_id: str  # The borrow_id or reserve_id it is about
+    message: str
+
+class NotificationSink(ABC):
+    """Where reminder batches go; swap in an SMTP-backed one in production"""
+    
+    @abstractmethod
+    def send(self, batch: List[Notification]):
+        pass
+
+class MemorySink(NotificationSink):
+    def __init__(self):
+        self.sent: List[Notification] = []
+        self.batches = 0
+    
+    def send(self, batch: List[Notification]):
+        self.sent += batch
+        self.batches += 1
+
+class FileSink(NotificationSink):
+    """Appends one JSON line per notification, like an outbox a mailer process drains"""
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def send(self, batch: List[Notification]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for notification in batch:
+                f.write(json.dumps(dict(notification._asdict(), send_at=notification.send_at.isoformat())) + "\n")
+
+class ReminderScheduler:
+    """Min-heap of notifications by send time.
+
+    Scheduling is a heappush. A tick peeks at the root, so it costs nothing
+    until something is due, then pops exactly the due entries and hands them
+    to the sink `batch_size` at a time. Cancelling (a borrow returned, a hold
+    withdrawn) just forgets the entry; the heap drops it when it surfaces.
+    """
+    REMINDER_LEAD = timedelta(days=2)  # "Due soon" goes out this long before the due date
+    
+    def __init__(self, sink: NotificationSink, batch_size: int = 500):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.heap: List[Tuple[datetime, int]] = []  # (send_at, seq)
+        self.pending: Dict[int, Notification] = {}  # seq -> not yet sent or cancelled
+        self.by_ref: Dict[str, List[int]] = {}  # ref_id -> pending seqs
+        self.seq = 0
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.pending)
+    
+    def schedule(self, notification: Notification):
+        with self.lock:
+            self.seq += 1
+            heapq.heappush(self.heap, (notification.send_at, self.seq))
+            self.pending[self.seq] = notification
+            self.by_ref.setdefault(notification.ref_id, []).append(self.seq)
+    
+    def cancel(self, ref_id: str):
+        with self.lock:
+            for seq in self.by_ref.pop(ref_id, ()):
+                del self.pending[seq]
+            if len(self.heap) > 2 * len(self.pending) + 1024:  # Mostly cancelled: rebuild without them
+                self.heap = [entry for entry in self.heap if entry[1] in self.pending]
+                heapq.heapify(self.heap)
+    
+    def schedule_borrow(self, borrow: 'Borrow', after: Optional[datetime] = None):
+        """Due-soon and overdue reminders for a borrow; skips any not later than `after`"""
+        title = borrow.book.name
+        due_soon = borrow.due_date - self.REMINDER_LEAD
+        if after is None or due_soon > after:
+            self.schedule(Notification(due_soon, "due_soon", borrow.member.member_id, borrow.borrow_id,
+                                       f"'{title}' is due back on {borrow.due_date:%Y-%m-%d}"))
+        if after is None or borrow.due_date > after:
+            self.schedule(Notification(borrow.due_date, "overdue", borrow.member.member_id, borrow.borrow_id,
+                                       f"'{title}' was due back on {borrow.due_date:%Y-%m-%d}"))
+    
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Send everything due by `now`; returns how many went out.
+
+        A batch stays pending until the sink accepts it: if `send` raises, its
+        reminders go back on the heap (unless cancelled meanwhile) and the
+        error propagates, so the next tick retries them.
+        """
+        now = now or datetime.now()
+        sent = 0
+        while True:
+            with self.lock:
+                due = []
+                while self.heap and self.heap[0][0] <= now and len(due) < self.batch_size:
+                    entry = heapq.heappop(self.heap)
+                    if entry[1] in self.pending:  # Otherwise cancelled
+                        due.append(entry)
+                batch = [self.pending[seq] for _, seq in due]
+            if not batch:
+                return sent
+            try:
+                self.sink.send(batch)
+            except BaseException:
+                with self.lock:
+                    for entry in due:
+                        if entry[1] in self.pending:
+                            heapq.heappush(self.heap, entry)
+                raise
+            with self.lock:
+                for _, seq in due:
+                    notification = self.pending.pop(seq, None)
+                    if notification is None:
+                        continue  # Cancelled while it was being sent
+                    seqs = self.by_ref[notification.ref_id]
+                    seqs.remove(seq)
+                    if not seqs:
+                        del self.by_ref[notification.ref_id]
+            sent += len(batch)
+
+# Recommendations
+class CoBorrowModel:
+    """Sparse book-by-book counts of members who borrowed both.
+
+    Each member's first borrow of a book adds one to that book's row and column
+    against every other book the member has borrowed. Members with more than
+    `max_member_books` distinct books (institutional accounts) are dropped from
+    the counts, which also keeps that update bounded. Top-k answers are cached
+    per book and dropped whenever the book's row changes.
+    """
+    
+    def __init__(self, max_member_books: int = 500):
+        self.max_member_books = max_member_books
+        self.member_books: Dict[str, Set[str]] = {}  # member_id -> distinct book_ids borrowed
+        self.counts: Dict[str, Dict[str, int]] = {}  # book_id -> {other book_id: members who borrowed both}
+        self.top: Dict[str, List[str]] = {}  # book_id -> cached ranking, possibly cut short
+        self.lock = threading.Lock()
+    
+    def record(self, member_id: str, book_id: str):
+        with self.lock:
+            books = self.member_books.setdefault(member_id, set())
+            if book_id in books:
+                return
+            books.add(book_id)
+            if len(books) <= self.max_member_books:
+                for other in books:
+                    if other != book_id:
+                        self._bump(book_id, other, 1)
+            elif len(books) == self.max_member_books + 1:  # Just crossed: take back what they added
+                books.discard(book_id)
+                for book, other in itertools.permutations(books, 2):
+                    self._add(book, other, -1)
+                books.add(book_id)
+    
+    def similar(self, book_id: str, k: int = 10) -> List[str]:
+        """Up to k books most often borrowed by the same members as `book_id`"""
+        with self.lock:
+            top = self.top.get(book_id)
+            row = self.counts.get(book_id, {})
+            if top is None or (len(top) < k and len(top) < len(row)):
+                top = self.top[book_id] = heapq.nsmallest(k, row, key=lambda other: (-row[other], other))
+            return top[:k]
+    
+    def rebuild(self, pairs: Iterable[Tuple[str, str]]):
+        """Recount from scratch over (member_id, book_id) pairs, e.g. every historical borrow"""
+        member_books: Dict[str, Set[str]] = {}
+        for member_id, book_id in pairs:
+            member_books.setdefault(member_id, set()).add(book_id)
+        try:
+            counts = self._sparse_counts(member_books)
+        except ImportError:
+            counts = self._python_counts(member_books)
+        with self.lock:
+            self.member_books, self.counts = member_books, counts
+            self.top.clear()
+    
+    def _sparse_counts(self, member_books: Dict[str, Set[str]]) -> Dict[str, Dict[str, int]]:
+        """C = X^T X over the member-by-book incidence matrix X"""
+        import numpy as np
+        from scipy import sparse
+        
+        book_ids = sorted({book_id for books in member_books.values() for book_id in books})
+        codes = {book_id: code for code, book_id in enumerate(book_ids)}
+        counted = [books for books in member_books.values() if len(books) <= self.max_member_books]
+        rows = np.repeat(np.arange(len(counted)), [len(books) for books in counted])
+        cols = np.fromiter((codes[book_id] for books in counted for book_id in books), dtype=np.int64, count=len(rows))
+        incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                      shape=(len(counted), len(book_ids)))
+        co = (incidence.T @ incidence).tocoo()
+        counts: Dict[str, Dict[str, int]] = {}
+        for i, j, count in zip(co.row.tolist(), co.col.tolist(), co.data.tolist()):
+            if i != j and count:
+                counts.setdefault(book_ids[i], {})[book_ids[j]] = count
+        return counts
+    
+    def _python_counts(self, member_books: Dict[str, Set[str]]) -> Dict[str, Dict[str, int]]:
+        counts: Dict[str, Dict[str, int]] = {}
+        for books in member_books.values():
+            if len(books) <= self.max_member_books:
+                for book, other in itertools.permutations(books, 2):
+                    row = counts.setdefault(book, {})
+                    row[other] = row.get(other, 0) + 1
+        return counts
+    
+    def _bump(self, book_id: str, other: str, delta: int):
+        self._add(book_id, other, delta)
+        self._add(other, book_id, delta)
+    
+    def _add(self, book_id: str, other: str, delta: int):
+        row = self.counts.setdefault(book_id, {})
+        count = row.get(other, 0) + delta
+        if count:
+            row[other] = count
+        else:
+            del row[other]
+        self.top.pop(book_id, None)
+
+# Reservations
+class ReserveQueue:
+    """FIFO of one book's reservations.
+
+    Cancelling only flips the Reserve's status; dead entries are dropped when
+    they reach the front, or all at once when they outnumber the live ones.
+    """
+    
+    def __init__(self):
+        self.queue = deque()  # Reserve, oldest first
+        self.active = 0  # Entries still ACTIVE
+    
+    def __len__(self) -> int:
+        return self.active
+    
+    def push(self, reserve: 'Reserve'):
+        self.queue.append(reserve)
+        self.active += 1
+    
+    def __iter__(self) -> Iterator['Reserve']:
+        # Live entries, oldest first
+        self.peek()  # Drop dead entries at the front so they aren't walked past again
+        return (reserve for reserve in self.queue if reserve.status == ReserveStatus.ACTIVE)
+    
+    def cancel(self, reserve: 'Reserve'):
+        reserve.status = ReserveStatus.CANCELLED
+        self._forget()
+    
+    def fulfil(self, reserve: 'Reserve'):
+        """Take a live entry out, wherever it stands in the queue"""
+        reserve.status = ReserveStatus.FULFILLED
+        self._forget()
+    
+    def _forget(self):
+        self.active -= 1
+        if len(self.queue) > 2 * self.active + 32:
+            self.queue = deque(entry for entry in self.queue if entry.status == ReserveStatus.ACTIVE)
+    
+    def peek(self) -> Optional['Reserve']:
+        while self.queue and self.queue[0].status != ReserveStatus.ACTIVE:
+            self.queue.popleft()
+        return self.queue[0] if self.queue else None
+    
+    def pop(self) -> 'Reserve':
+        reserve = self.peek()
+        self.queue.popleft()
+        self.active -= 1
+        return reserve
+
+# Storage
+class LibraryStorage(ABC):
+    """Where LibraryManager keeps its records.
+
+    `books`, `members`, `borrows` and `reserves` are mutable mappings keyed by
+    id. The manager assigns a record back after every change to it, so a
+    backend can persist on assignment. The query methods let a backend answer
+    the start-up questions from its own indexes instead of a full scan.
+    """
+    @property
+    @abstractmethod
+    def books(self) -> MutableMapping:
+        """book_id -> Book"""
+        pass
+    
+    @property
+    @abstractmethod
+    def members(self) -> MutableMapping:
+        """member_id -> LibMember"""
+        pass
+    
+    @property
+    @abstractmethod
+    def borrows(self) -> MutableMapping:
+        """borrow_id -> Borrow"""
+        pass
+    
+    @property
+    @abstractmethod
+    def reserves(self) -> MutableMapping:
+        """reserve_id -> Reserve"""
+        pass
+    
+    def active_borrows(self) -> Iterator['Borrow']:
+        return (borrow for borrow in self.borrows.values() if borrow.status == BorrowStatus.ACTIVE)
+    
+    def active_reserves(self) -> Iterator['Reserve']:
+        """Oldest first, so queues rebuild in the order members joined them"""
+        return (reserve for reserve in self.reserves.values() if reserve.status == ReserveStatus.ACTIVE)
+    
+    persistent = False  # Records outlive the process
+    
+    def borrow_counts(self) -> Dict[str, int]:
+        return Counter(borrow.book.book_id for borrow in self.borrows.values())
+    
+    def last_borrow_number(self) -> int:
+        """Highest N among the stored BOR<N> ids, 0 if none"""
+        return max((int(borrow_id[3:]) for borrow_id in self.borrows), default=0)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.flush()
+
+class InMemoryStorage(LibraryStorage):
+    """Plain dicts: fastest, but capped by RAM and gone on restart"""
+    
+    def __init__(self):
+        self._books = {}
+        self._members = {}
+        self._borrows = {}
+        self._reserves = {}
+    
+    @property
+    def books(self) -> MutableMapping:
+        return self._books
+    
+    @property
+    def members(self) -> MutableMapping:
+        return self._members
+    
+    @property
+    def borrows(self) -> MutableMapping:
+        return self._borrows
+    
+    @property
+    def reserves(self) -> MutableMapping:
+        return self._reserves
+
+class ConnectionPool:
+    """A fixed set of SQLite connections, each used by one thread at a time"""
+    
+    def __init__(self, path: str, size: int = 4):
+        self.idle: queue.Queue = queue.Queue()
+        for _ in range(size):
+            self.idle.put(sqlite3.connect(path, check_same_thread=False))
+    
+    @contextmanager
+    def connection(self):
+        conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+    
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().close()
+
+class SQLiteTable(MutableMapping):
+    """One entity table behind a dict interface.
+
+    Writes wait in `pending` until the storage commits a batch of them in one
+    transaction. Reads check pending writes, then records already in memory
+    (a weak identity map, so an id never has two live objects), then the
+    database through a pooled reader connection.
+    """
+    DELETED = object()
+    
+    def __init__(self, storage: 'SQLiteStorage', name: str, columns: List[str], to_row, from_row, after_load=None):
+        self.storage = storage
+        self.to_row = to_row  # record -> tuple in `columns` order
+        self.from_row = from_row  # tuple -> record
+        self.after_load = after_load  # Fills in state derived from other tables
+        self.pending: Dict[str, object] = {}  # id -> record, or DELETED
+        self.loaded = weakref.WeakValueDictionary()  # id -> record
+        key, fields = columns[0], ", ".join(columns)
+        # Fixed SQL text, so sqlite3's per-connection statement cache keeps them prepared
+        self.select_sql = f"SELECT {fields} FROM {name} WHERE {key} = ?"
+        self.scan_sql = f"SELECT {fields} FROM {name} ORDER BY rowid"
+        self.keys_sql = f"SELECT {key} FROM {name} ORDER BY rowid"
+        self.count_sql = f"SELECT COUNT(*) FROM {name}"
+        self.upsert_sql = (f"INSERT INTO {name} ({fields}) VALUES ({', '.join('?' * len(columns))}) "
+                           f"ON CONFLICT({key}) DO UPDATE SET "
+                           + ", ".join(f"{column} = excluded.{column}" for column in columns[1:]))
+        self.delete_sql = f"DELETE FROM {name} WHERE {key} = ?"
+    
+    def __getitem__(self, key: str):
+        with self.storage.lock:
+            record = self.pending.get(key)
+            if record is None:
+                record = self.loaded.get(key)
+        if record is self.DELETED:
+            raise KeyError(key)
+        if record is not None:
+            return record
+        rows = self.storage.read(self.select_sql, (key,))
+        if not rows:
+            raise KeyError(key)
+        return self.materialize(rows[0])
+    
+    def __setitem__(self, key: str, record):
+        with self.storage.lock:
+            self.pending[key] = record
+            self.loaded[key] = record
+            self.storage.wrote()
+    
+    def __delitem__(self, key: str):
+        self[key]  # KeyError if missing
+        with self.storage.lock:
+            self.pending[key] = self.DELETED
+            self.loaded.pop(key, None)
+            self.storage.wrote()
+    
+    def __iter__(self) -> Iterator[str]:
+        self.storage.flush()
+        return (row[0] for row in self.storage.stream(self.keys_sql))
+    
+    def __len__(self) -> int:
+        self.storage.flush()
+        return self.storage.read(self.count_sql)[0][0]
+    
+    def values(self) -> Iterator:
+        self.storage.flush()
+        return (self.materialize(row) for row in self.storage.stream(self.scan_sql))
+    
+    def materialize(self, row: tuple):
+        """Record for a fetched row, reusing the live object if there is one"""
+        with self.storage.lock:
+            record = self.pending.get(row[0])
+            if record is None or record is self.DELETED:  # A row read just before its delete was queued
+                record = self.loaded.get(row[0])
+            if record is None:
+                record = self.from_row(row)
+                self.loaded[row[0]] = record
+                if self.after_load is not None:
+                    self.after_load(record)
+            return record
+    
+    def take_pending(self) -> Tuple[List[tuple], List[tuple]]:
+        upserts = [self.to_row(record) for record in self.pending.values() if record is not self.DELETED]
+        deletes = [(key,) for key, record in self.pending.items() if record is self.DELETED]
+        self.pending = {}
+        return upserts, deletes
+
+class SQLiteStorage(LibraryStorage):
+    """SQLite-backed records that outlive the process and need not fit in RAM.
+
+    One writer connection commits pending writes every `batch_size` changes
+    (and on flush/close) in a single transaction; readers share a small
+    connection pool. WAL journaling lets readers run alongside a commit.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (book_id TEXT PRIMARY KEY, name TEXT NOT NULL, author TEXT NOT NULL,
+                                          total_copies INTEGER NOT NULL, available_copies INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS members (member_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL,
+                                            borrow_limit INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS borrows (borrow_id TEXT PRIMARY KEY, book_id TEXT NOT NULL, member_id TEXT NOT NULL,
+                                            borrow_date TEXT NOT NULL, due_date TEXT NOT NULL, return_date TEXT,
+                                            status TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS borrows_by_member ON borrows (member_id, status);
+        CREATE INDEX IF NOT EXISTS borrows_by_status ON borrows (status, due_date);
+        CREATE INDEX IF NOT EXISTS borrows_by_book ON borrows (book_id);
+        CREATE TABLE IF NOT EXISTS reserves (reserve_id TEXT PRIMARY KEY, book_id TEXT NOT NULL, member_id TEXT NOT NULL,
+                                             reserve_date TEXT NOT NULL, status TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS reserves_by_status ON reserves (status, book_id);
+    """
+    
+    persistent = True
+    
+    def __init__(self, path: str, pool_size: int = 4, batch_size: int = 1_000):
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.RLock()  # Pending writes and identity maps
+        self.unflushed = 0
+        self.writer = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute("PRAGMA synchronous=NORMAL")
+        self.writer.executescript(self.SCHEMA)
+        self.pool = ConnectionPool(path, pool_size)
+        
+        self._books = SQLiteTable(self, "books", ["book_id", "name", "author", "total_copies", "available_copies"],
+                                  self._book_row, self._load_book)
+        self._members = SQLiteTable(self, "members", ["member_id", "name", "age", "borrow_limit"],
+                                    self._member_row, self._load_member, self._load_member_borrows)
+        self._borrows = SQLiteTable(self, "borrows", ["borrow_id", "book_id", "member_id", "borrow_date",
+                                                      "due_date", "return_date", "status"],
+                                    self._borrow_row, self._load_borrow)
+        self._reserves = SQLiteTable(self, "reserves", ["reserve_id", "book_id", "member_id", "reserve_date", "status"],
+                                     self._reserve_row, self._load_reserve)
+        self.tables = [self._books, self._members, self._borrows, self._reserves]
+    
+    @property
+    def books(self) -> MutableMapping:
+        return self._books
+    
+    @property
+    def members(self) -> MutableMapping:
+        return self._members
+    
+    @property
+    def borrows(self) -> MutableMapping:
+        return self._borrows
+    
+    @property
+    def reserves(self) -> MutableMapping:
+        return self._reserves
+    
+    def read(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+    
+    def stream(self, sql: str, params: tuple = (), page_size: int = 1_000) -> Iterator[tuple]:
+        """Rows of a scan a page at a time, so memory doesn't grow with the table.
+
+        Uses a connection of its own: a slow consumer holds no pooled reader,
+        and the lookups it makes per row can't wait on one.
+        """
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            conn.close()
+    
+    def wrote(self):
+        """Caller holds self.lock"""
+        self.unflushed += 1
+        if self.unflushed >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        with self.lock:
+            if not self.unflushed:
+                return
+            self.writer.execute("BEGIN")
+            try:
+                for table in self.tables:
+                    upserts, deletes = table.take_pending()
+                    self.writer.executemany(table.upsert_sql, upserts)
+                    self.writer.executemany(table.delete_sql, deletes)
+            except BaseException:
+                self.writer.execute("ROLLBACK")
+                raise
+            self.writer.execute("COMMIT")
+            self.unflushed = 0
+    
+    def close(self):
+        self.flush()
+        self.pool.close()
+        self.writer.close()
+    
+    def active_borrows(self) -> Iterator['Borrow']:
+        self.flush()
+        rows = self.stream("SELECT borrow_id, book_id, member_id, borrow_date, due_date, return_date, status "
+                           "FROM borrows WHERE status = ? ORDER BY due_date", (BorrowStatus.ACTIVE.value,))
+        return (self.borrows.materialize(row) for row in rows)
+    
+    def active_reserves(self) -> Iterator['Reserve']:
+        self.flush()
+        rows = self.stream("SELECT reserve_id, book_id, member_id, reserve_date, status "
+                           "FROM reserves WHERE status = ? ORDER BY rowid", (ReserveStatus.ACTIVE.value,))
+        return (self.reserves.materialize(row) for row in rows)
+    
+    def borrow_counts(self) -> Dict[str, int]:
+        self.flush()
+        return dict(self.read("SELECT book_id, COUNT(*) FROM borrows GROUP BY book_id"))
+    
+    def last_borrow_number(self) -> int:
+        self.flush()
+        return self.read("SELECT COALESCE(MAX(CAST(SUBSTR(borrow_id, 4) AS INTEGER)), 0) FROM borrows")[0][0]
+    
+    # Row conversions
+    @staticmethod
+    def _book_row(book: 'Book') -> tuple:
+        return book.book_id, book.name, book.author, book.total_copies, book.available_copies
+    
+    @staticmethod
+    def _load_book(row: tuple) -> 'Book':
+        book = Book(*row[:4])
+        book.available_copies = row[4]
+        return book
+    
+    @staticmethod
+    def _member_row(member: 'LibMember') -> tuple:
+        return member.member_id, member.name, member.age, member.borrow_limit
+    
+    @staticmethod
+    def _load_member(row: tuple) -> 'LibMember':
+        member_id, name, age, borrow_limit = row
+        return LibMember(name, member_id, age, borrow_limit)
+    
+    def _load_member_borrows(self, member: 'LibMember'):
+        rows = self.read("SELECT borrow_id FROM borrows WHERE member_id = ? AND status = ? ORDER BY rowid",
+                         (member.member_id, BorrowStatus.ACTIVE.value))
+        for (borrow_id,) in rows:
+            member.current_borrows[borrow_id] = self.borrows[borrow_id]
+    
+    @staticmethod
+    def _borrow_row(borrow: 'Borrow') -> tuple:
+        return (borrow.borrow_id, borrow.book.book_id, borrow.member.member_id, borrow.borrow_date.isoformat(),
+                borrow.due_date.isoformat(), borrow.return_date.isoformat() if borrow.return_date else None,
+                borrow.status.value)
+    
+    def _load_borrow(self, row: tuple) -> 'Borrow':
+        borrow_id, book_id, member_id, borrow_date, due_date, return_date, status = row
+        borrow = Borrow(borrow_id, self._book_or_placeholder(book_id), self.members[member_id])
+        borrow.borrow_date = datetime.fromisoformat(borrow_date)
+        borrow.due_date = datetime.fromisoformat(due_date)
+        borrow.return_date = datetime.fromisoformat(return_date) if return_date else None
+        borrow.status = BorrowStatus(status)
+        return borrow
+    
+    @staticmethod
+    def _reserve_row(reserve: 'Reserve') -> tuple:
+        return (reserve.reserve_id, reserve.book.book_id, reserve.member.member_id,
+                reserve.reserve_date.isoformat(), reserve.status.value)
+    
+    def _load_reserve(self, row: tuple) -> 'Reserve':
+        reserve_id, book_id, member_id, reserve_date, status = row
+        reserve = Reserve(reserve_id, self._book_or_placeholder(book_id), self.members[member_id])
+        reserve.reserve_date = datetime.fromisoformat(reserve_date)
+        reserve.status = ReserveStatus(status)
+        return reserve
+    
+    def _book_or_placeholder(self, book_id: str) -> 'Book':
+        # History can outlive a book removed from the catalog
+        book = self.books.get(book_id)
+        return book if book is not None else Book(book_id, "", "", 0)
+
+# Archive
+class BorrowRecord(NamedTuple):
+    borrow_id: str
+    book_id: str
+    member_id: str
+    borrow_date: datetime
+    due_date: datetime
+    return_date: Optional[datetime]
+
+class ArchiveSegment:
+    """Returned borrows from one month, as parallel typed arrays.
+
+    Book and member ids become codes into per-segment tables. Sealing renumbers
+    members in id order and sorts the rows by member, so a member's history is
+    one bisected slice, and packs everything into zlib-compressed bytes.
+    """
+    COLUMNS = (("borrow_numbers", "q"), ("book_codes", "i"), ("member_codes", "i"),
+               ("borrow_times", "d"), ("due_times", "d"), ("return_times", "d"))
+    
+    def __init__(self, month: str):
+        self.month = month  # "YYYY-MM" of the return dates
+        self.book_ids: List[str] = []  # code -> book_id
+        self.member_ids: List[str] = []  # code -> member_id
+        self.book_codes: Dict[str, int] = {}
+        self.member_codes: Dict[str, int] = {}
+        self.member_rows: Optional[Dict[int, List[int]]] = {}  # member code -> rows; None once sorted
+        self.columns = {name: array(typecode) for name, typecode in self.COLUMNS}
+    
+    def __len__(self) -> int:
+        return len(self.columns["borrow_numbers"])
+    
+    def add(self, borrow_id: str, book_id: str, member_id: str, borrow_time: float, due_time: float,
+            return_time: float):
+        book_code = self._code(self.book_codes, self.book_ids, book_id)
+        member_code = self._code(self.member_codes, self.member_ids, member_id)
+        self.member_rows.setdefault(member_code, []).append(len(self))
+        values = (int(borrow_id[3:]), book_code, member_code, borrow_time, due_time, return_time)
+        for (name, _), value in zip(self.COLUMNS, values):
+            self.columns[name].append(value)
+    
+    def rows_for(self, member_id: str) -> List[BorrowRecord]:
+        if self.member_rows is not None:
+            code = self.member_codes.get(member_id)
+            return [self._record(row) for row in self.member_rows.get(code, ())]
+        code = bisect.bisect_left(self.member_ids, member_id)  # Sealed: ids sorted, code == position
+        if code == len(self.member_ids) or self.member_ids[code] != member_id:
+            return []
+        member_codes = self.columns["member_codes"]
+        lo = bisect.bisect_left(member_codes, code)
+        return [self._record(row) for row in range(lo, bisect.bisect_right(member_codes, code, lo))]
+    
+    def records(self) -> Iterator[BorrowRecord]:
+        return (self._record(row) for row in range(len(self)))
+    
+    def to_bytes(self) -> bytes:
+        member_ids = sorted(self.member_ids)
+        recode = array("i", [0]) * len(member_ids)  # Old member code -> position in member_ids
+        for code, member_id in enumerate(member_ids):
+            recode[self.member_codes[member_id]] = code
+        columns = dict(self.columns, member_codes=array("i", (recode[code] for code in self.columns["member_codes"])))
+        order = sorted(range(len(self)), key=columns["member_codes"].__getitem__)
+        header = json.dumps({"month": self.month, "books": self.book_ids, "members": member_ids,
+                             "rows": len(self)}).encode()
+        body = b"".join(array(typecode, (columns[name][row] for row in order)).tobytes()
+                        for name, typecode in self.COLUMNS)
+        return zlib.compress(header + b"\n" + body)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ArchiveSegment':
+        header, body = zlib.decompress(data).split(b"\n", 1)
+        header = json.loads(header)
+        segment = cls(header["month"])
+        segment.book_ids, segment.member_ids = header["books"], header["members"]
+        segment.member_rows = None  # Read-only from here; rows_for bisects member_ids
+        offset = 0
+        for name, typecode in cls.COLUMNS:
+            column = array(typecode)
+            size = column.itemsize * header["rows"]
+            column.frombytes(body[offset:offset + size])
+            segment.columns[name] = column
+            offset += size
+        return segment
+    
+    def _record(self, row: int) -> BorrowRecord:
+        columns = self.columns
+        return BorrowRecord(f"BOR{columns['borrow_numbers'][row]}", self.book_ids[columns["book_codes"][row]],
+                            self.member_ids[columns["member_codes"][row]],
+                            datetime.fromtimestamp(columns["borrow_times"][row]),
+                            datetime.fromtimestamp(columns["due_times"][row]),
+                            datetime.fromtimestamp(columns["return_times"][row]))
+    
+    @staticmethod
+    def _code(codes: Dict[str, int], ids: List[str], key: str) -> int:
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(ids)
+            ids.append(key)
+        return code
+
+class BorrowArchive:
+    """Cold storage for returned borrows, partitioned by return month.
+
+    The newest month stays open in memory; earlier months are sealed into
+    compressed segments, kept as bytes or, with a `directory`, as one file
+    each. With a directory the open month is also appended to a `.open` log
+    as each borrow arrives, so a crash loses none of them; it is replayed on
+    startup and deleted once the month is sealed. `member_segments` sends a
+    history query straight to the segments holding that member, and recently
+    read segments stay decoded in a small LRU cache.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, cache_size: int = 8):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.sealed: Dict[int, object] = {}  # segment number -> compressed bytes, or file path
+        self.open: Optional[ArchiveSegment] = None
+        self.open_number = -1
+        self.open_log = None  # Append-only file mirroring the open segment (directory only)
+        self.member_segments: Dict[str, List[int]] = {}  # member_id -> segment numbers, oldest first
+        self.book_counts: Counter = Counter()  # book_id -> archived borrows
+        self.count = 0
+        self.last_number = 0  # Highest N among archived BOR<N> ids
+        self.cache: OrderedDict = OrderedDict()  # segment number -> decoded ArchiveSegment
+        self.lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            names = sorted(os.listdir(directory))
+            for name in names:
+                if name.endswith(".seg"):
+                    self._load_file(os.path.join(directory, name))
+            for name in names:
+                if name.endswith(".open"):
+                    self._replay_open_log(os.path.join(directory, name), name[:-len(".open")] + ".seg" in names)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def add(self, borrow: 'Borrow'):
+        with self.lock:
+            month = borrow.return_date.strftime("%Y-%m")
+            if self.open is None or self.open.month != month:
+                self._seal()
+                self.open_number = len(self.sealed)
+                self.open = ArchiveSegment(month)
+            row = (borrow.borrow_id, borrow.book.book_id, borrow.member.member_id, borrow.borrow_date.timestamp(),
+                   borrow.due_date.timestamp(), borrow.return_date.timestamp())
+            if self.directory is not None:
+                if self.open_log is None:
+                    self.open_log = open(self._path(".open"), "a", encoding="utf-8")
+                self.open_log.write(json.dumps(row) + "\n")
+                self.open_log.flush()  # On disk before the caller drops the borrow from live storage
+            self._index(row)
+    
+    def member_history(self, member_id: str) -> List[BorrowRecord]:
+        """Archived borrows of one member, oldest first"""
+        with self.lock:
+            records = []
+            for number in self.member_segments.get(member_id, ()):
+                records += self._segment(number).rows_for(member_id)
+        records.sort(key=lambda record: record.borrow_date)
+        return records
+    
+    def __iter__(self) -> Iterator[BorrowRecord]:
+        for number in range(len(self.sealed) + (self.open is not None)):
+            with self.lock:
+                segment = self._segment(number)
+            yield from segment.records()
+    
+    def flush(self):
+        """Seal the open month into a compressed segment"""
+        with self.lock:
+            self._seal()
+    
+    def _seal(self):
+        if self.open is None:
+            return
+        data = self.open.to_bytes()
+        if self.directory is not None:
+            path = self._path(".seg")
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            if self.open_log is not None:
+                self.open_log.close()
+                self.open_log = None
+            if os.path.exists(self._path(".open")):
+                os.remove(self._path(".open"))  # The segment now holds everything it logged
+            data = path
+        self.sealed[self.open_number] = data
+        self.open = None
+    
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.open.month}-{self.open_number:06d}{suffix}")
+    
+    def _segment(self, number: int) -> ArchiveSegment:
+        if number == self.open_number and self.open is not None:
+            return self.open
+        segment = self.cache.get(number)
+        if segment is None:
+            data = self.sealed[number]
+            if isinstance(data, str):
+                with open(data, "rb") as f:
+                    data = f.read()
+            segment = self.cache[number] = ArchiveSegment.from_bytes(data)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        self.cache.move_to_end(number)
+        return segment
+    
+    def _load_file(self, path: str):
+        with open(path, "rb") as f:
+            segment = ArchiveSegment.from_bytes(f.read())
+        number = len(self.sealed)
+        self.sealed[number] = path
+        self.open_number = number + 1  # Nothing open yet; keep numbering past loaded files
+        for member_id in segment.member_ids:
+            self.member_segments.setdefault(member_id, []).append(number)
+        self.book_counts.update(segment.book_ids[code] for code in segment.columns["book_codes"])
+        self.count += len(segment)
+        self.last_number = max(self.last_number, max(segment.columns["borrow_numbers"], default=0))
+    
+    def _replay_open_log(self, path: str, sealed: bool):
+        if sealed:  # Crashed between writing the segment and deleting its log
+            os.remove(path)
+            return
+        self.open_number = len(self.sealed)
+        self.open = ArchiveSegment(os.path.basename(path)[:7])
+        valid = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break  # Torn write at the tail
+                self._index(row)
+                valid += len(line)
+        with open(path, "r+b") as f:
+            f.truncate(valid)  # So later appends don't land behind the torn line
+        os.replace(path, self._path(".open"))  # Numbered as it is now, if earlier segments went missing
+    
+    def _index(self, row: tuple):
+        """Add a (borrow_id, book_id, member_id, borrow, due, return time) row to the open segment"""
+        self.open.add(*row)
+        segments = self.member_segments.setdefault(row[2], [])
+        if not segments or segments[-1] != self.open_number:
+            segments.append(self.open_number)
+        self.book_counts[row[1]] += 1
+        self.count += 1
+        self.last_number = max(self.last_number, int(row[0][3:]))
+
+# Bulk import / export
+EXPORT_FIELDS = {
+    "books": ["book_id", "name", "author", "total_copies", "available_copies"],
+    "members": ["member_id", "name", "age", "borrow_limit"],
+    "borrows": ["borrow_id", "book_id", "member_id", "borrow_date", "due_date", "return_date", "status"],
+    "reserves": ["reserve_id", "book_id", "member_id", "reserve_date", "status"],
+}
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def read_records(path: str) -> Iterator[dict]:
+    """Stream rows from a .csv (with header) or .jsonl file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        elif path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Expected a .csv or .jsonl file: {path}")
+
+def write_records(path: str, rows: Iterable[dict], fields: List[str]) -> int:
+    """Stream rows to a .csv or .jsonl file, returning how many were written"""
+    if not path.endswith((".csv", ".jsonl")):
+        raise ValueError(f"Expected a .csv or .jsonl file: {path}")
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                written += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+                written += 1
+    return written
+
 # Main Library Manager
 class LibraryManager:
-    def __init__(self):
-        self.books = {}  # book_id -> Book
-        self.members = {}  # member_id -> LibMember
-        self.borrows = {}  # borrow_id -> Borrow
-        self.reserves = {}  # reserve_id -> Reserve
+    """Owns the catalog, members, borrows and reserves.
+
+    With `concurrent=True` a book's copies and reserve queue change only under
+    that book's lock, and a member's borrows only under that member's lock.
+    Locks are always taken book first, then at most one member, so borrows,
+    returns and reserves can overlap without deadlocking. The shared indexes
+    guard themselves.
+    
+    Records live in `storage` (in-memory dicts unless told otherwise); the
+    indexes above always live in memory and are rebuilt from storage on start.
+    With an `archive`, returned borrows leave `borrows` for it, so `borrows`
+    holds only the ones still out; a persistent storage needs a directory-backed
+    archive so they outlive the process too. With `reminders`, borrows and reserves
+    schedule their emails there and send_reminders() delivers the due ones.
+    """
+    def __init__(self, concurrent: bool = False, storage: Optional[LibraryStorage] = None,
+                 archive: Optional[BorrowArchive] = None, reminders: Optional[ReminderScheduler] = None):
+        self.storage = storage if storage is not None else InMemoryStorage()
+        if archive is not None and archive.directory is None and self.storage.persistent:
+            # Returns leave storage for the archive, so they would vanish with the process
+            raise ValueError("a persistent storage needs a BorrowArchive with a directory")
+        self.archive = archive
+        self.reminders = reminders
+        self.books = self.storage.books  # book_id -> Book
+        self.members = self.storage.members  # member_id -> LibMember
+        self.borrows = self.storage.borrows  # borrow_id -> Borrow
+        self.reserves = self.storage.reserves  # reserve_id -> Reserve
+        self.reserve_queues = {}  # book_id -> ReserveQueue of active reserves
         self.borrow_counter = 0
         self.reserve_counter = 0
+        self.search_index = BookSearchIndex(self.books)
+        self.autocomplete_index = AutocompleteIndex()
+        self.due_index = DueDateIndex()
+        self.co_borrows = CoBorrowModel()
+        self.concurrent = concurrent
+        self.book_locks: Dict[str, threading.Lock] = {}  # book_id -> lock (concurrent mode)
+        self.member_locks: Dict[str, threading.Lock] = {}  # member_id -> lock (concurrent mode)
+        self.id_lock = threading.Lock() if concurrent else nullcontext()  # Guards both counters
+        self.bulk_lock = threading.Lock() if concurrent else nullcontext()  # One bulk batch at a time
+        self._load_indexes()
+    
+    def _load_indexes(self):
+        """Index records a persistent storage already holds"""
+        # From the highest id in use rather than a count, which falls short if any record went missing
+        self.borrow_counter = max(self.storage.last_borrow_number(),
+                                  self.archive.last_number if self.archive is not None else 0)
+        self.reserve_counter = len(self.reserves)
+        if not len(self.books):
+            return
+        self.autocomplete_index.borrow_counts.update(self.storage.borrow_counts())
+        if self.archive is not None:
+            for book_id, count in self.archive.book_counts.items():
+                self.autocomplete_index.borrow_counts[book_id] = self.autocomplete_index.borrow_counts.get(book_id, 0) + count
+        for books in batched(self.books.values(), 10_000):  # A batch at a time, so the catalog needn't fit in RAM
+            self.search_index.add_many(books)
+            self.autocomplete_index.add_many(books)
+        self.autocomplete_index.rebuild()
+        self.rebuild_recommendations()
+        current_time = datetime.now()
+        for borrow in self.storage.active_borrows():
+            self.due_index.add(borrow)
+            if self.reminders is not None:  # Only what is still ahead; earlier ones went out before the restart
+                self.reminders.schedule_borrow(borrow, after=current_time)
+        for reserve in self.storage.active_reserves():
+            self.reserve_queues.setdefault(reserve.book.book_id, ReserveQueue()).push(reserve)
+    
+    def close(self):
+        self.storage.close()
+        if self.archive is not None:
+            self.archive.flush()
     
     # Book operations
     def add_book(self, book_id: str, name: str, author: str, copies: int):
-        self.books[book_id] = Book(book_id, name, author, copies)
+        with self._lock_for(self.book_locks, book_id):
+            book = self.books.get(book_id)
+            if book is None:
+                book = Book(book_id, name, author, copies)
+            else:  # Re-cataloguing keeps the same Book, so copies already out still count against it
+                self.search_index.remove(book)
+                self.autocomplete_index.remove(book)
+                self._revise(book, name, author, copies)
+            self.books[book_id] = book
+            self.search_index.add(book)
+            self.autocomplete_index.add(book)
+    
+    def add_books(self, rows: Iterable[Tuple[str, str, str, int]], batch_size: int = 10_000) -> int:
+        """Bulk add_book for (book_id, name, author, copies) rows, indexing a batch at a time"""
+        added = 0
+        for batch in batched(rows, batch_size):
+            with self.bulk_lock:
+                books = {}
+                for book_id, name, author, copies in batch:
+                    book = books.get(book_id) or self.books.get(book_id)
+                    if book is None:
+                        book = Book(book_id, name, author, copies)
+                    else:  # Same in-place update as add_book
+                        if book_id not in books:
+                            self.search_index.remove(book)
+                            self.autocomplete_index.remove(book)
+                        with self._lock_for(self.book_locks, book_id):  # Copies change only under the book's lock
+                            self._revise(book, name, author, copies)
+                    books[book_id] = book
+                self.books.update(books)
+                self.search_index.add_many(books.values())
+                self.autocomplete_index.add_many(books.values())
+            added += len(books)
+        self.autocomplete_index.rebuild()
+        return added
     
-    def search_books(self, query: str) -> List[Book]:
-        results = []
-        for book in self.books.values():
-            if query.lower() in book.name.lower() or query.lower() in book.author.lower():
-                results.append(book)
-        return results
+    @staticmethod
+    def _revise(book: Book, name: str, author: str, copies: int):
+        book.name = name
+        book.author = author
+        book.available_copies += copies - book.total_copies
+        book.total_copies = copies
+    
+    def remove_book(self, book_id: str) -> bool:
+        with self._lock_for(self.book_locks, book_id):
+            book = self.books.get(book_id)
+            if book is None or book.available_copies < book.total_copies:  # Copies still out
+                return False
+            if self.reserve_queues.get(book_id):  # Members still waiting
+                return False
+            self.search_index.remove(book)
+            self.autocomplete_index.remove(book)
+            del self.books[book_id]
+            return True
+    
+    def search_books(self, query: str, limit: Optional[int] = None) -> List[Book]:
+        # Word-prefix matching: "harr pot" finds "Harry Potter"; an empty query lists everything
+        if not tokenize(query):
+            return list(self.books.values())
+        matches = (self.books.get(book_id) for book_id in self.search_index.search(query, limit))
+        return [book for book in matches if book is not None]  # Skip books removed since the lookup
+    
+    def autocomplete(self, prefix: str, k: int = 10) -> List[str]:
+        # Titles and authors starting with the typed text, ranked by how often their books are borrowed
+        return self.autocomplete_index.complete(prefix, k)
     
     # Member operations
-    def add_member(self, member_id: str, name: str, age: int):
-        self.members[member_id] = LibMember(name, member_id, age)
+    def add_member(self, member_id: str, name: str, age: int, borrow_limit: int = 5):
+        self.members[member_id] = LibMember(name, member_id, age, borrow_limit)
+    
+    def add_members(self, rows: Iterable[Tuple[str, str, int, int]]) -> int:
+        """Bulk add_member for (member_id, name, age, borrow_limit) rows"""
+        added = 0
+        for member_id, name, age, borrow_limit in rows:
+            self.members[member_id] = LibMember(name, member_id, age, borrow_limit)
+            added += 1
+        return added
+    
+    # Import / export
+    def import_books(self, path: str, batch_size: int = 10_000) -> int:
+        rows = read_records(path)
+        return self.add_books(((row["book_id"], row["name"], row["author"], int(row["total_copies"]))
+                               for row in rows), batch_size)
+    
+    def import_members(self, path: str) -> int:
+        rows = read_records(path)
+        return self.add_members((row["member_id"], row["name"], int(row["age"]), int(row.get("borrow_limit") or 5))
+                                for row in rows)
+    
+    def export_records(self, path: str, kind: str) -> int:
+        """Stream one of EXPORT_FIELDS' kinds to a .csv or .jsonl file"""
+        return write_records(path, self.iter_records(kind), EXPORT_FIELDS[kind])
+    
+    def iter_records(self, kind: str) -> Iterator[dict]:
+        if kind == "books":
+            for book in self._scan(self.books):
+                yield {"book_id": book.book_id, "name": book.name, "author": book.author,
+                       "total_copies": book.total_copies, "available_copies": book.available_copies}
+        elif kind == "members":
+            for member in self._scan(self.members):
+                yield {"member_id": member.member_id, "name": member.name, "age": member.age,
+                       "borrow_limit": member.borrow_limit}
+        elif kind == "borrows":
+            for borrow in self._scan(self.borrows):
+                yield {"borrow_id": borrow.borrow_id, "book_id": borrow.book.book_id,
+                       "member_id": borrow.member.member_id, "borrow_date": borrow.borrow_date.isoformat(),
+                       "due_date": borrow.due_date.isoformat(),
+                       "return_date": borrow.return_date.isoformat() if borrow.return_date else None,
+                       "status": borrow.status.value}
+            for record in self.archive if self.archive is not None else ():
+                yield {"borrow_id": record.borrow_id, "book_id": record.book_id, "member_id": record.member_id,
+                       "borrow_date": record.borrow_date.isoformat(), "due_date": record.due_date.isoformat(),
+                       "return_date": record.return_date.isoformat(), "status": BorrowStatus.RETURNED.value}
+        elif kind == "reserves":
+            for reserve in self._scan(self.reserves):
+                yield {"reserve_id": reserve.reserve_id, "book_id": reserve.book.book_id,
+                       "member_id": reserve.member.member_id, "reserve_date": reserve.reserve_date.isoformat(),
+                       "status": reserve.status.value}
+        else:
+            raise ValueError(f"Unknown record kind: {kind}")
+    
+    def _scan(self, records: MutableMapping) -> Iterator:
+        # Lazily; only a plain dict other threads may resize mid-scan needs its keys copied first
+        if self.concurrent and isinstance(records, dict):
+            return (record for record in map(records.get, list(records)) if record is not None)
+        return iter(records.values())
     
     # Borrow operations
     def borrow_book(self, member_id: str, book_id: str) -> bool:
@@ -242,38 +1765,82 @@ class LibraryManager:
             return False
         
         member = self.members[member_id]
-        book = self.books[book_id]
-        
-        if not member.can_borrow() or not book.is_available():
+        with self._lock_for(self.book_locks, book_id), self._lock_for(self.member_locks, member_id):
+            book = self.books.get(book_id)  # Re-read: may have been replaced or removed
+            if book is None or not member.can_borrow() or not book.is_available():
+                return False
+            
+            self._create_borrow(member, book)
+            return True
+    
+    def return_book(self, borrow_id: str) -> bool:
+        if borrow_id not in self.borrows:
             return False
         
+        borrow = self.borrows[borrow_id]
+        with self._lock_for(self.book_locks, borrow.book.book_id):
+            with self._lock_for(self.member_locks, borrow.member.member_id):
+                if borrow.status != BorrowStatus.ACTIVE:
+                    return False
+                
+                # Update records
+                borrow.status = BorrowStatus.RETURNED
+                borrow.return_date = datetime.now()
+                borrow.book.available_copies += 1
+                del borrow.member.current_borrows[borrow_id]
+                if self.archive is not None:
+                    self.archive.add(borrow)
+                    del self.borrows[borrow_id]
+                else:
+                    self.borrows[borrow_id] = borrow  # Write back for persistent storage
+                self.books[borrow.book.book_id] = borrow.book
+            self.due_index.remove(borrow)
+            if self.reminders is not None:
+                self.reminders.cancel(borrow_id)
+            
+            # Hand the copy straight to the longest-waiting member who can take it;
+            # anyone at their borrow limit keeps their place for the next copy
+            queue = self.reserve_queues.get(borrow.book.book_id)
+            if queue:
+                for reserve in queue:
+                    with self._lock_for(self.member_locks, reserve.member.member_id):
+                        if reserve.member.can_borrow():
+                            queue.fulfil(reserve)
+                            self.reserves[reserve.reserve_id] = reserve
+                            self._create_borrow(reserve.member, borrow.book)
+                            self._notify_reserve(reserve, "reservation_fulfilled",
+                                                 f"Your reserved copy of '{borrow.book.name}' has been checked out to you")
+                            break
+        
+        return True
+    
+    def _create_borrow(self, member: LibMember, book: Book) -> Borrow:
+        """Caller holds the book's and the member's locks"""
         # Create borrow record
-        self.borrow_counter += 1
-        borrow_id = f"BOR{self.borrow_counter}"
+        with self.id_lock:
+            self.borrow_counter += 1
+            borrow_id = f"BOR{self.borrow_counter}"
         borrow = Borrow(borrow_id, book, member)
         
         # Update records
         book.available_copies -= 1
-        member.current_borrows.append(borrow)
+        member.current_borrows[borrow_id] = borrow
         self.borrows[borrow_id] = borrow
-        
-        return True
+        self.books[book.book_id] = book  # Write back for persistent storage
+        self.due_index.add(borrow)
+        self.autocomplete_index.record_borrow(book)
+        self.co_borrows.record(member.member_id, book.book_id)
+        if self.reminders is not None:
+            self.reminders.schedule_borrow(borrow)
+        return borrow
     
-    def return_book(self, borrow_id: str) -> bool:
-        if borrow_id not in self.borrows:
-            return False
-        
-        borrow = self.borrows[borrow_id]
-        if borrow.status != BorrowStatus.ACTIVE:
-            return False
-        
-        # Update records
-        borrow.status = BorrowStatus.RETURNED
-        borrow.return_date = datetime.now()
-        borrow.book.available_copies += 1
-        borrow.member.current_borrows.remove(borrow)
-        
-        return True
+    def _lock_for(self, locks: Dict[str, threading.Lock], key: str):
+        if not self.concurrent:
+            return nullcontext()
+        lock = locks.get(key)
+        if lock is None:
+            lock = locks.setdefault(key, threading.Lock())
+        return lock
     
     # Reserve operations
     def reserve_book(self, member_id: str, book_id: str) -> bool:
@@ -281,17 +1848,43 @@ class LibraryManager:
             return False
         
         member = self.members[member_id]
-        book = self.books[book_id]
-        
-        if book.is_available():  # No need to reserve if available
+        with self._lock_for(self.book_locks, book_id):
+            book = self.books.get(book_id)
+            if book is None or book.is_available():  # No need to reserve if available
+                return False
+            
+            with self.id_lock:
+                self.reserve_counter += 1
+                reserve_id = f"RES{self.reserve_counter}"
+            reserve = Reserve(reserve_id, book, member)
+            self.reserves[reserve_id] = reserve
+            self.reserve_queues.setdefault(book_id, ReserveQueue()).push(reserve)
+            self._notify_reserve(reserve, "reservation_placed", f"You are in the queue for '{book.name}'")
+            
+            return True
+    
+    def cancel_reservation(self, reserve_id: str) -> bool:
+        reserve = self.reserves.get(reserve_id)
+        if reserve is None:
             return False
-        
-        self.reserve_counter += 1
-        reserve_id = f"RES{self.reserve_counter}"
-        reserve = Reserve(reserve_id, book, member)
-        self.reserves[reserve_id] = reserve
-        
-        return True
+        with self._lock_for(self.book_locks, reserve.book.book_id):
+            if reserve.status != ReserveStatus.ACTIVE:
+                return False
+            self.reserve_queues[reserve.book.book_id].cancel(reserve)
+            self.reserves[reserve_id] = reserve
+            if self.reminders is not None:
+                self.reminders.cancel(reserve_id)
+            return True
+    
+    def _notify_reserve(self, reserve: Reserve, kind: str, message: str):
+        if self.reminders is not None:
+            self.reminders.cancel(reserve.reserve_id)  # Supersedes any notice about it not yet sent
+            self.reminders.schedule(Notification(datetime.now(), kind, reserve.member.member_id,
+                                                 reserve.reserve_id, message))
+    
+    def send_reminders(self, now: Optional[datetime] = None) -> int:
+        # Call periodically (e.g. once a minute); delivers every notification due by `now`
+        return self.reminders.tick(now) if self.reminders is not None else 0
     
     # Utility methods
     def get_member_books(self, member_id: str) -> List[Book]:
@@ -299,18 +1892,422 @@ class LibraryManager:
             return []
         
         member = self.members[member_id]
-        return [borrow.book for borrow in member.current_borrows]
+        return [borrow.book for borrow in member.current_borrows.values()]
+    
+    def get_member_history(self, member_id: str) -> List[BorrowRecord]:
+        # Everything the member has borrowed, oldest first; still-out borrows have no return_date
+        if self.archive is not None:
+            member = self.members.get(member_id)
+            current = member.current_borrows.values() if member is not None else ()
+            records = self.archive.member_history(member_id)
+        else:
+            current = [borrow for borrow in self.borrows.values() if borrow.member.member_id == member_id]
+            records = []
+        records += [BorrowRecord(borrow.borrow_id, borrow.book.book_id, member_id, borrow.borrow_date,
+                                 borrow.due_date, borrow.return_date) for borrow in current]
+        records.sort(key=lambda record: record.borrow_date)
+        return records
+    
+    def get_also_borrowed(self, book_id: str, k: int = 10) -> List[Book]:
+        # "Members who borrowed this also borrowed", skipping books no longer in the catalog
+        matches = (self.books.get(other) for other in self.co_borrows.similar(book_id, k))
+        return [book for book in matches if book is not None]
+    
+    def rebuild_recommendations(self):
+        """Batch-recount co-borrows over every borrow on record, archived ones included"""
+        pairs = ((borrow.member.member_id, borrow.book.book_id) for borrow in self.borrows.values())
+        if self.archive is not None:
+            pairs = itertools.chain(pairs, ((record.member_id, record.book_id) for record in self.archive))
+        self.co_borrows.rebuild(pairs)
     
     def get_overdue_books(self) -> List[Borrow]:
-        overdue = []
+        return self.due_index.due_between(None, datetime.now())
+    
+    def get_books_due_within(self, days: int) -> List[Borrow]:
+        # Not yet overdue but due in the next `days` days, for reminder emails
         current_time = datetime.now()
-        for borrow in self.borrows.values():
-            if borrow.status == BorrowStatus.ACTIVE and current_time > borrow.due_date:
-                overdue.append(borrow)
-        return overdue
+        return self.due_index.due_between(current_time, current_time + timedelta(days=days))
+    
+    def iter_due_borrows(self, until: datetime, after: Optional[Tuple[datetime, str]] = None) -> Iterator[Borrow]:
+        # Page with itertools.islice; pass the last borrow's (due_date, borrow_id) as `after` to resume
+        return self.due_index.iter_due(until, after)
+
+# Benchmarks (run with: python libary-managment-system.py --bench)
+def synthetic_catalog(size: int, seed: int = 1):
+    import random
+    
+    rng = random.Random(seed)
+    words = [f"{prefix}{suffix}" for prefix in ("mor", "sha", "lig", "tre", "vel", "qua", "dor", "ism", "pen", "hal")
+             for suffix in ("ad", "ow", "ine", "ence", "ark", "ium", "ent", "or", "ith", "us")] * 2
+    words += [f"term{i}" for i in range(5000)]
+    surnames = [f"author{i}" for i in range(20000)]
+    for i in range(size):
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(2, 5)))
+        yield f"B{i}", title.title(), f"{rng.choice(('Ann', 'Ben', 'Cy', 'Dee'))} {rng.choice(surnames)}", 2
+
+def benchmark_search(size: int = 1_000_000, queries: int = 200):
+    import random
+    import time
+    
+    library = LibraryManager()
+    began = time.perf_counter()
+    for book_id, name, author, copies in synthetic_catalog(size):
+        library.add_book(book_id, name, author, copies)
+    print(f"indexed {size:,} books in {time.perf_counter() - began:.1f}s")
+    
+    rng = random.Random(2)
+    sample = rng.sample(list(library.books.values()), queries)
+    workload = [" ".join(book.name.split()[:2]).lower() for book in sample[:queries // 2]]
+    workload += [f"{book.author.split()[1]} {book.name.split()[0][:3]}".lower() for book in sample[queries // 2:]]
+    
+    began = time.perf_counter()
+    for query in workload:
+        library.search_books(query, limit=20)
+    indexed = (time.perf_counter() - began) / len(workload)
+    
+    began = time.perf_counter()
+    for query in workload[:5]:
+        [book for book in library.books.values() if query in book.name.lower() or query in book.author.lower()]
+    scanned = (time.perf_counter() - began) / 5
+    print(f"inverted index: {indexed * 1e3:.2f} ms/query, full scan: {scanned * 1e3:.1f} ms/query")
+
+def benchmark_autocomplete(size: int = 1_000_000, borrows: int = 200_000, queries: int = 1_000):
+    import random
+    import time
+    
+    library = LibraryManager()
+    began = time.perf_counter()
+    for book_id, name, author, copies in synthetic_catalog(size):
+        library.add_book(book_id, name, author, copies)
+    print(f"built autocomplete over {size:,} books in {time.perf_counter() - began:.1f}s")
+    
+    rng = random.Random(3)
+    books = list(library.books.values())
+    for _ in range(borrows):  # Skewed so a few titles dominate
+        library.autocomplete_index.record_borrow(books[int(rng.paretovariate(1.2)) % size])
+    
+    # Simulate keystrokes: every prefix of a sampled title or author
+    workload = []
+    for book in rng.sample(books, queries // 10):
+        text = rng.choice((book.name, book.author))
+        workload += [text[:length] for length in range(1, min(len(text), 10) + 1)]
+    began = time.perf_counter()
+    for prefix in workload:
+        library.autocomplete(prefix)
+    print(f"autocomplete: {(time.perf_counter() - began) / len(workload) * 1e3:.3f} ms/keystroke")
+
+def benchmark_overdue(history: int = 1_000_000, active: int = 50_000, overdue: int = 1_000):
+    import time
+    
+    library = LibraryManager()
+    library.add_book("B1", "Bench", "Bench", history)
+    member = LibMember("Bench", "M1", 30)
+    current_time = datetime.now()
+    for i in range(history):  # Oldest first, as they would have been borrowed
+        borrow = Borrow(f"BOR{i}", library.books["B1"], member)
+        borrow.due_date = current_time + timedelta(minutes=i - history + active - overdue, seconds=30)
+        library.borrows[borrow.borrow_id] = borrow
+        library.due_index.add(borrow)
+        if i < history - active:
+            borrow.status = BorrowStatus.RETURNED
+            library.due_index.remove(borrow)
+    
+    began = time.perf_counter()
+    scanned = [borrow for borrow in library.borrows.values()
+               if borrow.status == BorrowStatus.ACTIVE and current_time > borrow.due_date]
+    scan = time.perf_counter() - began
+    began = time.perf_counter()
+    indexed = library.get_overdue_books()
+    index = time.perf_counter() - began
+    assert len(indexed) == len(scanned) == overdue
+    print(f"overdue over {history:,} borrows: index {index * 1e3:.2f} ms, full scan {scan * 1e3:.1f} ms")
+
+def benchmark_reservations(holds: int = 50_000, copies: int = 3):
+    import time
+    
+    library = LibraryManager()
+    library.add_book("B1", "Bestseller", "Popular Author", copies)
+    for i in range(holds + copies):
+        library.add_member(f"M{i}", f"Member {i}", 30)
+    for i in range(copies):
+        library.borrow_book(f"M{i}", "B1")
+    
+    began = time.perf_counter()
+    for i in range(copies, holds + copies):
+        library.reserve_book(f"M{i}", "B1")
+    reserving = time.perf_counter() - began
+    
+    began = time.perf_counter()
+    for reserve_id in list(library.reserves)[::10]:  # Every tenth member gives up
+        library.cancel_reservation(reserve_id)
+    cancelling = time.perf_counter() - began
+    
+    # Every return passes the copy down the queue until it drains
+    began = time.perf_counter()
+    out = list(library.borrows)
+    while out:
+        issued = library.borrow_counter
+        library.return_book(out.pop())
+        if library.borrow_counter > issued:  # Copy went to the next hold
+            out.append(f"BOR{library.borrow_counter}")
+    fulfilling = time.perf_counter() - began
+    
+    fulfilled = sum(reserve.status == ReserveStatus.FULFILLED for reserve in library.reserves.values())
+    print(f"{holds:,} holds on one title: reserve {holds / reserving:,.0f}/s, "
+          f"cancel {holds // 10 / cancelling:,.0f}/s, return+fulfil {fulfilled / fulfilling:,.0f}/s")
+
+def benchmark_borrow_return(loans: int = 100_000):
+    import random
+    import time
+    
+    library = LibraryManager()
+    library.add_member("M1", "University Archive", 0, borrow_limit=loans)
+    for i in range(loans):
+        library.add_book(f"B{i}", f"Volume {i}", "Archive", 1)
+    
+    began = time.perf_counter()
+    for i in range(loans):
+        library.borrow_book("M1", f"B{i}")
+    borrowing = time.perf_counter() - began
+    
+    borrow_ids = list(library.borrows)
+    random.Random(4).shuffle(borrow_ids)
+    began = time.perf_counter()
+    for borrow_id in borrow_ids:
+        library.return_book(borrow_id)
+    returning = time.perf_counter() - began
+    print(f"{loans:,} loans on one account: borrow {loans / borrowing:,.0f}/s, return {loans / returning:,.0f}/s")
+
+def stress_test_concurrent_borrowing(requests: int = 20_000, workers: int = 32, book_count: int = 20,
+                                     member_count: int = 2_000):
+    """Borrow, return, reserve and cancel from a thread pool, then check copies and ids still add up"""
+    import random
+    import sys
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    
+    library = LibraryManager(concurrent=True)
+    for i in range(book_count):
+        library.add_book(f"B{i}", f"Title {i}", "Author", 1 + i % 3)
+    for i in range(member_count):
+        library.add_member(f"M{i}", f"Member {i}", 30)
+    
+    def act(request_number: int):
+        rng = random.Random(request_number)
+        member_id, book_id = f"M{rng.randrange(member_count)}", f"B{rng.randrange(book_count)}"
+        roll = rng.random()
+        if roll < 0.5:
+            library.borrow_book(member_id, book_id)
+        elif roll < 0.8:
+            borrows = list(library.members[member_id].current_borrows)
+            if borrows:
+                library.return_book(rng.choice(borrows))
+        elif roll < 0.95:
+            library.reserve_book(member_id, book_id)
+        else:
+            library.cancel_reservation(f"RES{rng.randint(1, max(1, library.reserve_counter))}")
+    
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Force the thread interleavings a race needs
+    try:
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(act, range(requests)))
+        elapsed = time.perf_counter() - began
+    finally:
+        sys.setswitchinterval(switch_interval)
+    
+    assert len(library.borrows) == library.borrow_counter, "duplicate borrow ids"
+    assert len(library.reserves) == library.reserve_counter, "duplicate reserve ids"
+    active = [borrow for borrow in library.borrows.values() if borrow.status == BorrowStatus.ACTIVE]
+    for book in library.books.values():
+        out = sum(borrow.book is book for borrow in active)
+        assert 0 <= book.available_copies == book.total_copies - out, f"{book.book_id} copies out of sync"
+    for member in library.members.values():
+        assert len(member.current_borrows) <= member.borrow_limit, f"{member.member_id} over limit"
+        assert all(borrow.status == BorrowStatus.ACTIVE for borrow in member.current_borrows.values())
+    for book_id, queue in library.reserve_queues.items():
+        waiting = sum(reserve.status == ReserveStatus.ACTIVE and reserve.book.book_id == book_id
+                      for reserve in library.reserves.values())
+        assert len(queue) == waiting, f"{book_id} reserve queue out of sync"
+    assert len(library.due_index.active) == len(active)
+    print(f"{requests:,} concurrent requests on {workers} threads: {requests / elapsed:,.0f} requests/s, "
+          f"{len(active):,} copies out, invariants hold")
+
+def benchmark_bulk_import(size: int = 10_000_000, loop_sample: int = 200_000):
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.csv")
+        rows = ({"book_id": book_id, "name": name, "author": author, "total_copies": copies}
+                for book_id, name, author, copies in synthetic_catalog(size))
+        write_records(path, rows, ["book_id", "name", "author", "total_copies"])
+        
+        looped = LibraryManager()
+        began = time.perf_counter()
+        for row in itertools.islice(read_records(path), loop_sample):
+            looped.add_book(row["book_id"], row["name"], row["author"], int(row["total_copies"]))
+        per_row = (time.perf_counter() - began) / loop_sample
+        
+        library = LibraryManager()
+        began = time.perf_counter()
+        library.import_books(path)
+        elapsed = time.perf_counter() - began
+        print(f"bulk import of {size:,} rows: {elapsed:.1f}s ({size / elapsed:,.0f} rows/s), "
+              f"add_book loop would take ~{per_row * size:.0f}s")
+        
+        tracemalloc.start()
+        began = time.perf_counter()
+        library.export_records(os.path.join(directory, "export.jsonl"), "books")
+        elapsed = time.perf_counter() - began
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"exported {size:,} books in {elapsed:.1f}s, peak extra memory {peak_bytes / 2**20:.0f} MiB")
+
+def benchmark_storage_backends(book_count: int = 100_000, member_count: int = 10_000, operations: int = 50_000):
+    """Same mixed search/borrow/return workload against each storage backend"""
+    import os
+    import random
+    import tempfile
+    import time
+    
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [("in-memory", InMemoryStorage), ("sqlite", lambda: SQLiteStorage(os.path.join(directory, "lib.db")))]
+        for label, make_storage in backends:
+            library = LibraryManager(storage=make_storage())
+            library.add_books(synthetic_catalog(book_count))
+            library.add_members((f"M{i}", f"Member {i}", 30, 5) for i in range(member_count))
+            
+            rng = random.Random(6)
+            queries = [book.name.split()[0].lower() for book in itertools.islice(library.books.values(), 1_000)]
+            out: List[str] = []
+            began = time.perf_counter()
+            for _ in range(operations):
+                roll = rng.random()
+                if roll < 0.5:
+                    library.search_books(rng.choice(queries), limit=20)
+                elif roll < 0.8 or not out:
+                    if library.borrow_book(f"M{rng.randrange(member_count)}", f"B{rng.randrange(book_count)}"):
+                        out.append(f"BOR{library.borrow_counter}")
+                else:
+                    library.return_book(out.pop(rng.randrange(len(out))))
+            library.storage.flush()
+            elapsed = time.perf_counter() - began
+            library.close()
+            print(f"{label}: {operations / elapsed:,.0f} mixed ops/s over {book_count:,} books")
+
+def benchmark_borrow_archive(years: int = 3, borrows_per_day: int = 2_000, member_count: int = 50_000,
+                             book_count: int = 20_000, lookups: int = 100):
+    """Memory and per-member history latency with returned borrows kept hot vs archived by month"""
+    import gc
+    import random
+    import time
+    import tracemalloc
+    
+    books = [Book(f"B{i}", f"Title {i}", "Author", 5) for i in range(book_count)]
+    members = [LibMember(f"Member {i}", f"M{i}", 30) for i in range(member_count)]
+    start = datetime.now() - timedelta(days=365 * years)
+    
+    def history():
+        rng = random.Random(8)
+        for number in range(borrows_per_day * 365 * years):
+            borrow = Borrow(f"BOR{number + 1}", rng.choice(books), rng.choice(members))
+            borrow.borrow_date = start + timedelta(seconds=number * 86_400 / borrows_per_day)
+            borrow.due_date = borrow.borrow_date + timedelta(days=14)
+            borrow.return_date = borrow.borrow_date + timedelta(days=rng.randint(1, 20))
+            borrow.status = BorrowStatus.RETURNED
+            yield borrow
+    
+    for label in ("hot dict", "archive"):
+        library = LibraryManager(archive=BorrowArchive() if label == "archive" else None)
+        gc.collect()
+        tracemalloc.start()
+        for borrow in history():
+            if library.archive is not None:
+                library.archive.add(borrow)
+            else:
+                library.borrows[borrow.borrow_id] = borrow
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        rng = random.Random(9)
+        began = time.perf_counter()
+        for _ in range(lookups):
+            library.get_member_history(rng.choice(members).member_id)
+        latency = (time.perf_counter() - began) / lookups
+        print(f"{label}: {held / 2**20:,.0f} MiB for {borrows_per_day * 365 * years:,} returned borrows, "
+              f"member history {latency * 1e3:.2f} ms")
+
+def benchmark_recommendations(borrows: int = 2_000_000, member_count: int = 200_000, book_count: int = 50_000,
+                              queries: int = 1_000):
+    import random
+    import time
+    
+    rng = random.Random(10)
+    pairs = [(f"M{rng.randrange(member_count)}", f"B{int(rng.paretovariate(1.1)) % book_count}")
+             for _ in range(borrows)]
+    
+    model = CoBorrowModel()
+    began = time.perf_counter()
+    model.rebuild(pairs)
+    print(f"batch rebuild over {borrows:,} borrows: {time.perf_counter() - began:.1f}s")
+    
+    incremental = CoBorrowModel()
+    began = time.perf_counter()
+    for member_id, book_id in pairs[:200_000]:
+        incremental.record(member_id, book_id)
+    print(f"incremental updates: {200_000 / (time.perf_counter() - began):,.0f} borrows/s")
+    
+    books = [f"B{rng.randrange(book_count)}" for _ in range(queries)]
+    model.top.clear()
+    for label in ("computed", "cached"):
+        began = time.perf_counter()
+        for book_id in books:
+            model.similar(book_id)
+        print(f"top-10 {label}: {(time.perf_counter() - began) / queries * 1e3:.3f} ms/query")
+
+def benchmark_reminders(pending: int = 2_000_000, cancelled: float = 0.2):
+    import random
+    import time
+    
+    rng = random.Random(11)
+    start = datetime(2024, 1, 1)
+    reminders = ReminderScheduler(MemorySink())
+    notifications = [Notification(start + timedelta(seconds=rng.randrange(14 * 24 * 3600)), "due_soon",
+                                  f"M{i % 100_000}", f"BOR{i}", "Bench") for i in range(pending)]
+    began = time.perf_counter()
+    for notification in notifications:
+        reminders.schedule(notification)
+    print(f"scheduled {pending:,} reminders: {pending / (time.perf_counter() - began):,.0f}/s")
+    for i in rng.sample(range(pending), int(pending * cancelled)):
+        reminders.cancel(f"BOR{i}")
+    
+    began = time.perf_counter()
+    for minute in range(1_000):  # Nothing is due yet
+        reminders.tick(start - timedelta(minutes=minute))
+    idle = (time.perf_counter() - began) / 1_000
+    
+    began = time.perf_counter()
+    for minute in range(1, 24 * 60 + 1):  # One day of minute ticks
+        reminders.tick(start + timedelta(minutes=minute))
+    day = time.perf_counter() - began
+    sent = len(reminders.sink.sent)
+    
+    now = start + timedelta(days=1, minutes=1)
+    began = time.perf_counter()
+    [notification for notification in notifications if now - timedelta(minutes=1) < notification.send_at <= now]
+    scan = time.perf_counter() - began
+    print(f"idle tick: {idle * 1e6:.1f} us, one day of ticks: {sent:,} sent in {reminders.sink.batches:,} batches "
+          f"in {day:.2f}s ({day / (24 * 60) * 1e3:.2f} ms/tick), rescan per tick: {scan * 1e3:.0f} ms")
 
 # Example Usage
 if __name__ == "__main__":
+    import sys
+    
     library = LibraryManager()
     
     # Add books
@@ -328,5 +2325,21 @@ if __name__ == "__main__":
     results = library.search_books("Harry")
     print(f"Found {len(results)} books")
     
+    # Type-ahead
+    print(library.autocomplete("ha"))  # ['Harry Potter']
+    
     # Reserve book
-    print(library.reserve_book("M002", "B001"))  # True if all copies borrowed
\ No newline at end of file
+    print(library.reserve_book("M002", "B001"))  # True if all copies borrowed
+    
+    if "--bench" in sys.argv:
+        benchmark_search()
+        benchmark_autocomplete()
+        benchmark_overdue()
+        benchmark_reservations()
+        benchmark_borrow_return()
+        stress_test_concurrent_borrowing()
+        benchmark_bulk_import()
+        benchmark_storage_backends()
+        benchmark_borrow_archive()
+        benchmark_recommendations()
+        benchmark_reminders()